@@ -0,0 +1,123 @@
+"""A python script to benchmark the reports against synthetic datasets
+
+Usage: python bench/benchmark.py [rows...]
+
+Each report function of the scripts is run against an SQLite database
+generated by `generate_dataset.py`, by default at 10k, 100k and 1M
+participations.
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+import tempfile
+
+import pandas as pd
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCH_DIR)
+sys.path.insert(0, os.path.join(BENCH_DIR, os.pardir, "src"))
+
+import loader
+import attendees
+import receipt_audit
+import generate_dataset
+import desk_collections
+import attendance_sheets
+import event_wise_entries
+import year_wise_participations
+
+SIZES = [10000, 100000, 1000000]
+RESULTS_FILE = "bench_results.json"
+
+
+def attendance_report(connection, output_dir):
+    attendance_sheets.generate_sheets(connection, output_dir)
+
+
+def desk_report(connection, output_dir):
+    desk_collections.collections(connection, output_dir)
+
+
+def year_wise_report(connection, output_dir):
+    departments = pd.read_sql("SELECT DISTINCT type, department FROM events", connection)
+    for _, row in departments.iterrows():
+        year_wise_participations.build_zip(connection, row["type"], row["department"], output_dir=output_dir)
+
+
+def entries_report(connection, output_dir):
+    last_id = pd.read_sql("SELECT MAX(id) AS id FROM participations", connection)["id"].iloc[0]
+    event_wise_entries.build_entries(connection, last_id)
+
+
+def attendees_report(connection, output_dir):
+    df = pd.read_sql(attendees.QUERY, connection)
+    index = attendees.build_index(df)
+    for by in ("event", "department", "year"):
+        attendees.unique_counts(index, by).to_csv(os.path.join(output_dir, "{}.csv".format(by)), index=False)
+    return {"participants": len(index), "index_mb": round(loader.memory_usage(index) / 2 ** 20, 1)}
+
+
+def receipt_audit_report(connection, output_dir):
+    df = pd.read_sql(receipt_audit.QUERY.format(paid=""), connection)
+    return {name: len(found) for name, found in receipt_audit.audit(df).items()}
+
+
+REPORTS = {
+    "attendance": attendance_report,
+    "desks": desk_report,
+    "yearwise": year_wise_report,
+    "entries": entries_report,
+    "attendees": attendees_report,
+    "receipts": receipt_audit_report,
+}
+
+
+def run(sizes):
+    """
+    A function which times every report at each dataset size.
+
+    Parameters
+    ----------
+    sizes: list
+        Numbers of participations to benchmark with.
+
+    Returns
+    -------
+    list:
+        Dicts of rows, report name and seconds taken.
+    """
+
+    results = []
+    with tempfile.TemporaryDirectory() as work_dir:
+        for rows in sizes:
+            start = time.perf_counter()
+            connection = generate_dataset.load_sqlite(os.path.join(work_dir, "udaan.sqlite3"), rows)
+            print("Generated {} rows in {:.2f}s".format(rows, time.perf_counter() - start))
+
+            for name, report in REPORTS.items():
+                output_dir = tempfile.mkdtemp(dir=work_dir)
+                start = time.perf_counter()
+                figures = report(connection, output_dir) or {}
+                seconds = time.perf_counter() - start
+                results.append(dict({"rows": rows, "report": name, "seconds": round(seconds, 4)}, **figures))
+                print("{:>10} {:<12} {:8.2f}s {}".format(rows, name, seconds, figures or ""))
+                logging.info("Benchmark {} at {} rows took {:.3f}s".format(name, rows, seconds))
+
+            connection.close()
+    return results
+
+
+def main():
+    logging.basicConfig(filename="logs.log", filemode="a", level=logging.DEBUG,
+                        format="\n%(asctime)s  %(levelname)s: %(message)s")
+    sizes = [int(size) for size in sys.argv[1:]] or SIZES
+    results = run(sizes)
+    with open(RESULTS_FILE, "w") as results_file:
+        json.dump(results, results_file, indent=2)
+
+
+if __name__ == '__main__':
+    main()
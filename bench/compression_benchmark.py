@@ -0,0 +1,58 @@
+"""A python script to compare the size and time of the CSV export codecs
+
+Usage: python bench/compression_benchmark.py [rows]
+"""
+
+import os
+import sys
+import time
+import tempfile
+
+import pandas as pd
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCH_DIR)
+sys.path.insert(0, os.path.join(BENCH_DIR, os.pardir, "src"))
+
+import compression
+import generate_dataset
+
+COLUMNS = ["id", "receipt_no", "event", "name_1", "name_2", "name_3", "name_4", "name_5", "name_6",
+           "mobile", "year"]
+
+# (codec, level) of the streaming CSV writer
+CODECS = [("none", None), ("gzip", 1), ("gzip", 6), ("gzip", 9), ("zstd", 3), ("zstd", 19)]
+
+# (method, level) of the zip archive
+ZIP_METHODS = [("stored", None), ("deflate", 1), ("deflate", 6), ("deflate", 9), ("bzip2", 9), ("lzma", None)]
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    events = generate_dataset.generate_events()
+    df = pd.DataFrame(list(generate_dataset.generate_participations(events, rows)), columns=COLUMNS)
+
+    print("{:<8} {:>5} {:>12} {:>9}".format("codec", "level", "bytes", "seconds"))
+    with tempfile.TemporaryDirectory() as work_dir:
+        for codec, level in CODECS:
+            start = time.perf_counter()
+            try:
+                path = compression.to_csv(df, os.path.join(work_dir, "export.csv"), codec, level, index=False)
+            except ImportError:
+                print("{:<8} {:>5} skipped, zstandard is not installed".format(codec, level))
+                continue
+            seconds = time.perf_counter() - start
+            print("{:<8} {:>5} {:>12} {:>9.3f}".format(codec, str(level), os.path.getsize(path), seconds))
+
+        for method, level in ZIP_METHODS:
+            zip_name = os.path.join(work_dir, "export.zip")
+            start = time.perf_counter()
+            with compression.open_zip(zip_name, method, level) as archive:
+                compression.csv_to_zip(archive, df, "export.csv", index=False)
+            seconds = time.perf_counter() - start
+            print("{:<8} {:>5} {:>12} {:>9.3f}".format("zip " + method, str(level), os.path.getsize(zip_name),
+                                                      seconds))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,225 @@
+"""A python script to generate a synthetic Udaan dataset of events and participations
+
+Usage: python bench/generate_dataset.py <rows> [sqlite file]
+"""
+
+import sys
+import random
+import sqlite3
+import logging
+
+DEPARTMENTS = ["CE", "CP", "EC", "EE", "EL", "IT", "ME", "PE"]
+EVENT_TYPES = ["technical", "non-technical", "adventure"]
+DESKS = ["A", "B", "C", "D", "E", "F", "G", "H"]
+YEARS = ["1", "2", "3", "4"]
+FIRST_NAMES = ["Aarav", "Aditi", "Akash", "Ananya", "Arjun", "Bhavya", "Dhruv", "Diya", "Harsh", "Isha",
+               "Jay", "Kavya", "Krish", "Meera", "Neel", "Nisha", "Parth", "Pooja", "Rahul", "Riya",
+               "Sahil", "Sneha", "Tanvi", "Varun", "Yash", "Zeel"]
+LAST_NAMES = ["Patel", "Shah", "Mehta", "Desai", "Joshi", "Trivedi", "Pandya", "Bhatt", "Modi", "Parikh"]
+
+EVENTS_TABLE = "CREATE TABLE events (" \
+               "name VARCHAR(100) PRIMARY KEY, " \
+               "type VARCHAR(20) NOT NULL, " \
+               "department VARCHAR(10) NOT NULL, " \
+               "fees INT NOT NULL, " \
+               "team_size INT NOT NULL)"
+
+PARTICIPATIONS_TABLE = "CREATE TABLE participations (" \
+                       "id INTEGER PRIMARY KEY, " \
+                       "receipt_no VARCHAR(20) NOT NULL, " \
+                       "event VARCHAR(100) NOT NULL, " \
+                       "name_1 VARCHAR(100), name_2 VARCHAR(100), name_3 VARCHAR(100), " \
+                       "name_4 VARCHAR(100), name_5 VARCHAR(100), name_6 VARCHAR(100), " \
+                       "mobile BIGINT, " \
+                       "year VARCHAR(2))"
+
+
+def generate_events(count=60, seed=17):
+    """
+    A function which generates rows of the `events` table.
+
+    Parameters
+    ----------
+    count: int
+        Number of events.
+
+    seed: int
+        Seed of the random number generator.
+
+    Returns
+    -------
+    list:
+        Tuples of (name, type, department, fees, team_size).
+    """
+
+    rand = random.Random(seed)
+    events = []
+    for i in range(count):
+        department = DEPARTMENTS[i % len(DEPARTMENTS)]
+        # Roughly one in ten events is an adventure event
+        event_type = "adventure" if i % 10 == 9 else EVENT_TYPES[i % 2]
+        team_size = rand.choice([1, 1, 2, 2, 3, 4, 6])
+        fees = 50 * team_size if event_type != "adventure" else rand.choice([300, 500, 800])
+        events.append(("{} Event {}".format(department, i + 1), event_type, department, fees, team_size))
+    return events
+
+
+def generate_participations(events, rows, seed=17):
+    """
+    A generator which yields rows of the `participations` table. Receipts
+    are numbered contiguously per desk in the `DESK/NNN` format.
+
+    Parameters
+    ----------
+    events: list
+        Rows of the `events` table as returned by `generate_events`.
+
+    rows: int
+        Number of participations.
+
+    seed: int
+        Seed of the random number generator.
+
+    Yields
+    ------
+    tuple:
+        (id, receipt_no, event, name_1, ..., name_6, mobile, year)
+    """
+
+    rand = random.Random(seed)
+    receipts = dict.fromkeys(DESKS, 0)
+    # A pool of people so that the same person registers for several events
+    people = [("{} {}".format(rand.choice(FIRST_NAMES), rand.choice(LAST_NAMES)),
+               rand.randint(7000000000, 9999999999))
+              for _ in range(max(1, rows // 3))]
+
+    for row_id in range(1, rows + 1):
+        name, _, _, _, team_size = events[rand.randrange(len(events))]
+        desk = rand.choice(DESKS)
+        receipts[desk] += 1
+        members = [rand.choice(people) for _ in range(team_size)]
+        names = [member[0] for member in members] + [None] * (6 - team_size)
+        # A few mobile numbers are missing as in the production data
+        mobile = members[0][1] if rand.random() > 0.01 else None
+        yield (row_id, "{}/{}".format(desk, receipts[desk]), name) + tuple(names) + (mobile, rand.choice(YEARS))
+
+
+def load_sqlite(path, rows, seed=17, batch_size=10000):
+    """
+    A function which creates and fills the `events` and `participations`
+    tables in an SQLite database.
+
+    Parameters
+    ----------
+    path: str
+        Path of the SQLite database file, or `:memory:`.
+
+    rows: int
+        Number of participations.
+
+    seed: int
+        Seed of the random number generator.
+
+    batch_size: int
+        Number of rows inserted per `executemany` call.
+
+    Returns
+    -------
+    sqlite3.Connection:
+        Connection to the filled database.
+    """
+
+    connection = sqlite3.connect(path, check_same_thread=False)
+    cursor = connection.cursor()
+    cursor.execute("DROP TABLE IF EXISTS participations")
+    cursor.execute("DROP TABLE IF EXISTS events")
+    cursor.execute(EVENTS_TABLE)
+    cursor.execute(PARTICIPATIONS_TABLE)
+
+    events = generate_events(seed=seed)
+    cursor.executemany("INSERT INTO events VALUES (?, ?, ?, ?, ?)", events)
+    insert_rows(cursor, "?", generate_participations(events, rows, seed), batch_size)
+
+    connection.commit()
+    cursor.close()
+    return connection
+
+
+def load_mysql(connection, rows, seed=17, batch_size=10000):
+    """
+    A function which creates and fills the `events` and `participations`
+    tables in a MySQL compatible database.
+
+    Parameters
+    ----------
+    connection: pymysql.connections.Connection
+        Connection to a scratch database. Existing tables are dropped.
+
+    rows: int
+        Number of participations.
+
+    seed: int
+        Seed of the random number generator.
+
+    batch_size: int
+        Number of rows inserted per `executemany` call.
+    """
+
+    cursor = connection.cursor()
+    cursor.execute("DROP TABLE IF EXISTS participations")
+    cursor.execute("DROP TABLE IF EXISTS events")
+    cursor.execute(EVENTS_TABLE)
+    cursor.execute(PARTICIPATIONS_TABLE)
+
+    events = generate_events(seed=seed)
+    cursor.executemany("INSERT INTO events VALUES (%s, %s, %s, %s, %s)", events)
+    insert_rows(cursor, "%s", generate_participations(events, rows, seed), batch_size)
+
+    connection.commit()
+    cursor.close()
+
+
+def insert_rows(cursor, marker, rows, batch_size):
+    """
+    A function which inserts participations in batches.
+
+    Parameters
+    ----------
+    cursor:
+        DB-API cursor.
+
+    marker: str
+        Parameter marker of the database driver.
+
+    rows: iterable
+        Rows of the `participations` table.
+
+    batch_size: int
+        Number of rows inserted per `executemany` call.
+    """
+
+    query = "INSERT INTO participations VALUES ({})".format(", ".join([marker] * 11))
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == batch_size:
+            cursor.executemany(query, batch)
+            batch = []
+    if batch:
+        cursor.executemany(query, batch)
+
+
+def main():
+    logging.basicConfig(filename="logs.log", filemode="a", level=logging.DEBUG,
+                        format="\n%(asctime)s  %(levelname)s: %(message)s")
+    rows = int(sys.argv[1])
+    path = sys.argv[2] if len(sys.argv) > 2 else "udaan.sqlite3"
+
+    connection = load_sqlite(path, rows)
+    connection.close()
+    logging.info("Generated {} participations in {}".format(rows, path))
+    print("Generated {} participations in {}".format(rows, path))
+
+
+if __name__ == '__main__':
+    main()
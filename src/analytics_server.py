@@ -0,0 +1,304 @@
+"""A python script to serve the current analytics over local HTTP
+
+Usage:
+    python src/analytics_server.py serve [port] [refresh seconds] [host]
+    python src/analytics_server.py bench [clients] [requests]
+
+Serves `/events`, `/desks` and `/years` as `.json` or `.csv`. Responses come
+from an in-process cache refreshed on an interval and carry an ETag, so
+clients polling with If-None-Match get an empty 304 while nothing changed.
+The service listens on 127.0.0.1 unless another host is given.
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import hashlib
+import logging
+import threading
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pymysql
+
+import instrument
+import summaries
+
+EVENTS_QUERY = "SELECT event, COUNT(*) AS entries FROM participations GROUP BY event ORDER BY entries DESC"
+
+DESKS_QUERY = "SELECT " + summaries.DESK + " AS desk, COUNT(*) AS entries, SUM(e.fees) AS fees " \
+              "FROM participations p JOIN events e ON p.event = e.name GROUP BY 1 ORDER BY 1"
+
+YEARS_QUERY = "SELECT event, COALESCE(year, '0') AS year, COUNT(*) AS entries " \
+              "FROM participations GROUP BY event, year"
+
+
+def get_config(file_name):
+    """
+    A function which takes the path of the configuration
+    file and returns a config object.
+
+    Parameters
+    ----------
+    file_name: str
+        Path of JSON configuration file.
+
+    Returns
+    -------
+    config: dict
+        Dictionary object created from JSON configuration.
+    """
+
+    with open(file_name) as config_file:
+        return json.load(config_file)
+
+
+def get_reports(connection):
+    """
+    A function which computes the event counts, desk totals and
+    year wise pivot.
+
+    Parameters
+    ----------
+    connection: pymysql.connections.Connection
+        Database connection object.
+
+    Returns
+    -------
+    dict:
+        Report name -> pandas.core.frame.DataFrame
+    """
+
+    years = instrument.read_sql(YEARS_QUERY, connection)
+    years = years.pivot_table(index="event", columns="year", values="entries", fill_value=0).reset_index()
+    years.columns = [str(column) for column in years.columns]
+
+    return {
+        "events": instrument.read_sql(EVENTS_QUERY, connection),
+        "desks": instrument.read_sql(DESKS_QUERY, connection),
+        "years": years
+    }
+
+
+def render(reports):
+    """
+    A function which renders every report as JSON and CSV with an ETag.
+
+    Parameters
+    ----------
+    reports: dict
+        Report name -> pandas.core.frame.DataFrame
+
+    Returns
+    -------
+    dict:
+        Path -> (body, content type, etag)
+    """
+
+    cache = {}
+    for name, df in reports.items():
+        for extension, body, content_type in (
+                ("json", df.to_json(orient="records").encode("utf-8"), "application/json"),
+                ("csv", df.to_csv(index=False).encode("utf-8"), "text/csv")):
+            etag = '"{}"'.format(hashlib.sha1(body).hexdigest())
+            cache["/{}.{}".format(name, extension)] = (body, content_type, etag)
+    return cache
+
+
+class Cache:
+    """
+    Rendered responses refreshed from the database on an interval.
+
+    Parameters
+    ----------
+    load: callable
+        Function returning the reports as returned by `get_reports`.
+
+    interval: float
+        Seconds between refreshes.
+    """
+
+    def __init__(self, load, interval=60.0):
+        self.load = load
+        self.interval = interval
+        self.responses = render(load())
+        self.stopped = threading.Event()
+
+    def get(self, path):
+        return self.responses.get(path)
+
+    def refresh_forever(self):
+        while not self.stopped.wait(self.interval):
+            try:
+                # Swapping the dict is atomic, readers see old or new responses
+                self.responses = render(self.load())
+            except Exception as ex:
+                logging.exception(str(ex))
+
+
+def etag_matches(header, etag):
+    """
+    A function which checks an If-None-Match header against an ETag
+    using the weak comparison of RFC 7232. The header may be `*` or a
+    comma separated list of tags, each of them optionally `W/` prefixed.
+
+    Parameters
+    ----------
+    header: str
+        Value of the If-None-Match header, or None.
+
+    etag: str
+        Current ETag of the response.
+
+    Returns
+    -------
+    bool:
+        True if the client's copy is current.
+    """
+
+    if header is None:
+        return False
+    if header.strip() == "*":
+        return True
+    tag = etag[2:] if etag.startswith("W/") else etag
+    return tag in re.findall(r'(?:W/)?("[^"]*")', header)
+
+
+def make_handler(cache):
+    class AnalyticsHandler(BaseHTTPRequestHandler):
+        """Serves cached reports with ETag and If-None-Match support"""
+
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            response = cache.get(self.path)
+            if response is None:
+                self.send_error(404)
+                return
+
+            body, content_type, etag = response
+            if etag_matches(self.headers.get("If-None-Match"), etag):
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.send_header("ETag", etag)
+            self.send_header("Cache-Control", "no-cache")
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return AnalyticsHandler
+
+
+def bench(cache, clients=20, requests=5000):
+    """
+    A function which measures requests per second of the service with
+    concurrent clients, started on a free local port. Half of the
+    requests revalidate with If-None-Match.
+
+    Parameters
+    ----------
+    cache: Cache
+        The response cache.
+
+    clients: int
+        Number of concurrent clients.
+
+    requests: int
+        Total number of requests.
+
+    Returns
+    -------
+    dict:
+        Counts per status, seconds taken and requests per second.
+    """
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(cache))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = "http://127.0.0.1:{}".format(server.server_address[1])
+    paths = sorted(cache.responses)
+
+    def fetch(i):
+        path = paths[i % len(paths)]
+        headers = {"If-None-Match": cache.get(path)[2]} if i % 2 else {}
+        try:
+            with urllib.request.urlopen(urllib.request.Request(url + path, headers=headers)) as response:
+                response.read()
+                return response.status
+        except urllib.error.HTTPError as http_err:
+            return http_err.code
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as executor:
+        statuses = list(executor.map(fetch, range(requests)))
+    seconds = time.perf_counter() - start
+
+    server.shutdown()
+    server.server_close()
+
+    return {
+        "200": statuses.count(200),
+        "304": statuses.count(304),
+        "seconds": round(seconds, 4),
+        "per_second": round(requests / seconds) if seconds else None
+    }
+
+
+def main():
+    try:
+        logging.basicConfig(filename="logs.log", filemode="a", level=logging.DEBUG,
+                            format="\n%(asctime)s  %(levelname)s: %(message)s")
+        config = get_config(os.path.join(os.path.abspath("."), "config.json"))
+        command = sys.argv[1] if len(sys.argv) > 1 else "serve"
+
+        # One warm connection is reused by every refresh
+        connection = pymysql.connect(host=config["mysql_host"], user=config["mysql_user"],
+                                     passwd=config["mysql_pass"], db=config["mysql_db"], autocommit=True)
+
+        def load():
+            connection.ping(reconnect=True)
+            return get_reports(connection)
+
+        if command == "serve":
+            port = int(sys.argv[2]) if len(sys.argv) > 2 else 8019
+            interval = float(sys.argv[3]) if len(sys.argv) > 3 else 60.0
+            host = sys.argv[4] if len(sys.argv) > 4 else "127.0.0.1"
+            cache = Cache(load, interval)
+            threading.Thread(target=cache.refresh_forever, daemon=True).start()
+            server = ThreadingHTTPServer((host, port), make_handler(cache))
+            print("Serving analytics on http://{}:{}".format(host, port))
+            server.serve_forever()
+
+        elif command == "bench":
+            clients = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+            requests = int(sys.argv[3]) if len(sys.argv) > 3 else 5000
+            print(bench(Cache(load), clients, requests))
+
+        connection.close()
+
+    except FileNotFoundError as file_err:
+        logging.exception(str(file_err))
+    except json.decoder.JSONDecodeError as json_err:
+        logging.exception(str(json_err))
+    except KeyError as key_err:
+        logging.exception(str(key_err))
+    except pymysql.err.Error as pymysql_err:
+        logging.exception(pymysql_err)
+    except Exception as ex:
+        logging.exception(str(ex))
+
+
+if __name__ == '__main__':
+    main()
@@ -7,6 +7,10 @@ import logging
 import pymysql
 import pandas as pd
 
+import loader
+import profiling
+import instrument
+
 
 def get_config(file_name):
     """
@@ -70,7 +74,7 @@ def get_data(connection, query):
         executing the query.
     """
 
-    return pd.read_sql(query, connection)
+    return instrument.read_sql(query, connection)
 
 
 def get_combined_names(row):
@@ -84,11 +88,51 @@ def get_combined_names(row):
     ).strip()
 
 
+def generate_sheets(connection, output_dir="."):
+    """
+    A function which writes one attendance workbook per event
+    except adventure events.
+
+    Parameters
+    ----------
+    connection: pymysql.connections.Connection
+        Database connection object.
+
+    output_dir: str
+        Directory of the workbooks.
+    """
+
+    # Attendance sheets are not required for adventure events
+    query = "SELECT name FROM events WHERE type != 'adventure'"
+    logging.info(query)
+
+    events = get_data(connection, query)
+
+    participants_query = "SELECT receipt_no, name_1, name_2, name_3, name_4, name_5, name_6, mobile " \
+                         "FROM participations WHERE event = \"{}\""
+
+    for index, row in events.iterrows():
+        participants = loader.read_typed(participants_query.format(row["name"]), connection)
+        name_columns = ["name_1", "name_2", "name_3", "name_4", "name_5", "name_6"]
+        participants[name_columns] = participants[name_columns].fillna("")
+        participants["name"] = participants.apply(lambda row: get_combined_names(row), axis=1)
+        # TODO - modify index parameter for correct output
+        # Excel file should not skip any participants
+        file_name = os.path.join(output_dir, "{}.xlsx".format(row["name"]))
+        with instrument.stage("write", file_name) as info:
+            pd.DataFrame(
+                participants[["receipt_no", "name", "mobile"]],
+                index=list(range(1, len(participants)))
+            ).to_excel(file_name, sheet_name=row["name"], index_label="Sr. No.")
+            info.update(instrument.written(file_name, len(participants)))
+
+
 def main():
     try:
         # Initialize logging module
         logging.basicConfig(filename="logs.log", filemode="a", level=logging.DEBUG,
                             format="\n%(asctime)s  %(levelname)s: %(message)s")
+        instrument.start("attendance_sheets")
         # Name of configuration file
         config_file_name = "config.json"
         # Get absolute file path of configuration file
@@ -106,25 +150,7 @@ def main():
         connection = pymysql.connect(host=host, user=user, passwd=password, db=database)
         logging.info("Connected to database {} on host {} ".format(database, host))
 
-        # Attendance sheets are not required for adventure events
-        query = "SELECT name FROM events WHERE type != 'adventure'"
-        logging.info(query)
-
-        events = get_data(connection, query)
-
-        participants_query = "SELECT receipt_no, name_1, name_2, name_3, name_4, name_5, name_6, mobile " \
-                             "FROM participations WHERE event = \"{}\""
-
-        for index, row in events.iterrows():
-            participants = get_data(connection, participants_query.format(row["name"]))
-            participants = participants.fillna("")
-            participants["name"] = participants.apply(lambda row: get_combined_names(row), axis=1)
-            # TODO - modify index parameter for correct output
-            # Excel file should not skip any participants
-            pd.DataFrame(
-                participants[["receipt_no", "name", "mobile"]],
-                index=list(range(1, len(participants)))
-            ).to_excel("{}.xlsx".format(row["name"]), row["name"], index_label="Sr. No.")
+        generate_sheets(connection)
 
         print("Done")
 
@@ -143,4 +169,4 @@ def main():
 
 
 if __name__ == '__main__':
-    main()
+    profiling.run(main, 'attendance_sheets')
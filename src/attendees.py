@@ -0,0 +1,146 @@
+"""A python script to count unique attendees across events
+
+Usage: python src/attendees.py
+
+Team members in `name_1` to `name_6` are melted into one row per participant
+and identified by a hash of their normalized name and the team's mobile
+number. Unique attendee counts are written per event, department and year.
+"""
+
+import os
+import json
+import time
+import logging
+
+import pymysql
+import pandas as pd
+
+import loader
+import profiling
+import instrument
+import recipients
+
+QUERY = "SELECT " \
+        "p.id, p.event, p.name_1, p.name_2, p.name_3, p.name_4, p.name_5, p.name_6, p.mobile, p.year, " \
+        "e.department " \
+        "FROM " \
+        "participations p " \
+        "JOIN " \
+        "events e " \
+        "ON p.event = e.name"
+
+NAME_COLUMNS = ["name_1", "name_2", "name_3", "name_4", "name_5", "name_6"]
+
+
+def get_config(file_name):
+    """
+    A function which takes the path of the configuration
+    file and returns a config object.
+
+    Parameters
+    ----------
+    file_name: str
+        Path of JSON configuration file.
+
+    Returns
+    -------
+    config: dict
+        Dictionary object created from JSON configuration.
+    """
+
+    with open(file_name) as config_file:
+        return json.load(config_file)
+
+
+def build_index(df):
+    """
+    A function which builds one row per participant with a 64 bit
+    hash of the normalized (name, mobile) key.
+
+    Parameters
+    ----------
+    df: pandas.core.frame.DataFrame
+        Participations with `name_1` to `name_6`, `mobile`, `event`,
+        `year` and `department` columns.
+
+    Returns
+    -------
+    pandas.core.frame.DataFrame
+        Columns `key`, `event`, `department` and `year`.
+    """
+
+    columns = [column for column in ("event", "department", "year") if column in df.columns]
+    members = df[columns + NAME_COLUMNS].assign(mobile=recipients.normalize_mobiles(df["mobile"]).fillna(""))
+    members = members.melt(id_vars=columns + ["mobile"], value_vars=NAME_COLUMNS,
+                           value_name="name").drop(columns="variable")
+
+    names = members["name"].astype("string").str.strip().str.lower().str.replace(r"\s+", " ", regex=True)
+    members = members.assign(name=names).dropna(subset=["name"])
+    members = members[members["name"] != ""]
+
+    key = pd.util.hash_pandas_object(members[["name", "mobile"]], index=False)
+    return members[columns].assign(key=key.to_numpy())
+
+
+def unique_counts(index, by):
+    """
+    A function which counts unique attendees per group.
+
+    Parameters
+    ----------
+    index: pandas.core.frame.DataFrame
+        The participant index returned by `build_index`.
+
+    by: str
+        The column to group by, e.g. `event`, `department` or `year`.
+
+    Returns
+    -------
+    pandas.core.frame.DataFrame
+        Columns `by` and `unique attendees`.
+    """
+
+    return index.groupby(by, observed=True)["key"].nunique().rename("unique attendees").reset_index()
+
+
+def main():
+    try:
+        logging.basicConfig(filename="logs.log", filemode="a", level=logging.DEBUG,
+                            format="\n%(asctime)s  %(levelname)s: %(message)s")
+        instrument.start("attendees")
+        config = get_config(os.path.join(os.path.abspath("."), "config.json"))
+
+        connection = pymysql.connect(host=config["mysql_host"], user=config["mysql_user"],
+                                     passwd=config["mysql_pass"], db=config["mysql_db"])
+        df = loader.read_typed(QUERY, connection)
+        connection.close()
+
+        start = time.perf_counter()
+        index = build_index(df)
+        seconds = time.perf_counter() - start
+
+        print("Unique attendees: {}".format(index["key"].nunique()))
+        print("Index of {} participants built in {:.2f}s using {:.1f} MB".format(
+            len(index), seconds, loader.memory_usage(index) / 2 ** 20))
+
+        for by in ("event", "department", "year"):
+            counts = unique_counts(index, by)
+            file_name = "Unique attendees by {}.csv".format(by)
+            with instrument.stage("write", file_name) as info:
+                counts.to_csv(file_name, index=False)
+                info.update(instrument.written(file_name, len(counts)))
+
+    except FileNotFoundError as file_err:
+        logging.exception(str(file_err))
+    except json.decoder.JSONDecodeError as json_err:
+        logging.exception(str(json_err))
+    except KeyError as key_err:
+        logging.exception(str(key_err))
+    except pymysql.err.Error as pymysql_err:
+        logging.exception(pymysql_err)
+    except Exception as ex:
+        logging.exception(str(ex))
+
+
+if __name__ == '__main__':
+    profiling.run(main, 'attendees')
@@ -0,0 +1,455 @@
+"""A python script to run a local event check-in service
+
+Usage:
+    python src/checkin.py serve <event> [port] [host]
+    python src/checkin.py loadtest <event> [volunteers] [scans] [--write-back]
+
+The participants of an event and their check-ins already in the
+`attendance` table are preloaded into memory, so a restarted service still
+reports repeated scans as duplicates. Volunteers mark attendance with
+`POST /checkin/<receipt no>` and `GET /participants` lists everyone with
+their status. Receipt numbers are matched ignoring case and surrounding
+spaces. Check-ins are written back to MySQL in batched transactions by a
+background thread instead of one write per scan.
+
+The service listens on 127.0.0.1 by default. Pass `0.0.0.0` or the LAN
+address as host to take scans from volunteers' devices.
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import logging
+import threading
+import datetime
+import urllib.error
+import urllib.request
+from urllib.parse import quote, unquote
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pymysql
+import pandas as pd
+
+import loader
+import instrument
+
+PARTICIPANTS_QUERY = "SELECT receipt_no, name_1, name_2, name_3, name_4, name_5, name_6, mobile " \
+                     "FROM participations WHERE event = '{}'"
+
+ATTENDANCE_TABLE = "CREATE TABLE IF NOT EXISTS attendance (" \
+                   "event VARCHAR(100) NOT NULL, " \
+                   "receipt_no VARCHAR(20) NOT NULL, " \
+                   "checked_in_at DATETIME NOT NULL, " \
+                   "PRIMARY KEY (event, receipt_no))"
+
+INSERT_ATTENDANCE = "INSERT IGNORE INTO attendance (event, receipt_no, checked_in_at) VALUES (%s, %s, %s)"
+
+ATTENDANCE_QUERY = "SELECT receipt_no, checked_in_at FROM attendance WHERE event = %s"
+
+NAME_COLUMNS = ["name_1", "name_2", "name_3", "name_4", "name_5", "name_6"]
+
+
+def get_config(file_name):
+    """
+    A function which takes the path of the configuration
+    file and returns a config object.
+
+    Parameters
+    ----------
+    file_name: str
+        Path of JSON configuration file.
+
+    Returns
+    -------
+    config: dict
+        Dictionary object created from JSON configuration.
+    """
+
+    with open(file_name) as config_file:
+        return json.load(config_file)
+
+
+def receipt_key(receipt_no):
+    # Same normalization as lookup.receipt_key, without its prefix
+    return str(receipt_no).strip().upper()
+
+
+def get_connection(config):
+    return pymysql.connect(host=config["mysql_host"], user=config["mysql_user"],
+                           passwd=config["mysql_pass"], db=config["mysql_db"])
+
+
+class CheckIn:
+    """
+    In memory attendance of one event with batched write back.
+
+    Parameters
+    ----------
+    event: str
+        Name of the event.
+
+    participants: dict
+        Receipt key -> dict of `receipt_no`, `names` and `mobile`.
+
+    connect: callable
+        Function returning a new database connection, or None to
+        keep the attendance in memory only.
+
+    batch_size: int
+        Number of pending check-ins which triggers a flush.
+
+    interval: float
+        Maximum seconds between flushes while check-ins are pending.
+
+    checked_in: dict
+        Receipt key -> check-in time of the check-ins already written.
+    """
+
+    def __init__(self, event, participants, connect=None, batch_size=200, interval=2.0, checked_in=None):
+        self.event = event
+        self.participants = participants
+        self.connect = connect
+        self.batch_size = batch_size
+        self.interval = interval
+
+        self.checked_in = dict(checked_in or {})
+        self.pending = []
+        self.lock = threading.Lock()
+        self.wake = threading.Event()
+        self.stopped = threading.Event()
+        self.writer = threading.Thread(target=self.write_back, daemon=True)
+
+    def start(self):
+        if self.connect is not None:
+            self.writer.start()
+
+    def mark(self, receipt_no):
+        """
+        A method which marks a participant as present.
+
+        Parameters
+        ----------
+        receipt_no: str
+            Receipt number of the participant as scanned.
+
+        Returns
+        -------
+        tuple:
+            Status (`ok`, `duplicate` or `unknown`) and the participant
+            record if the receipt belongs to this event.
+        """
+
+        key = receipt_key(receipt_no)
+        participant = self.participants.get(key)
+        if participant is None:
+            return "unknown", None
+
+        with self.lock:
+            if key in self.checked_in:
+                return "duplicate", participant
+            now = datetime.datetime.now().replace(microsecond=0)
+            self.checked_in[key] = now
+            self.pending.append((self.event, participant["receipt_no"], now))
+            full = len(self.pending) >= self.batch_size
+
+        if full:
+            self.wake.set()
+        return "ok", participant
+
+    def flush(self, connection):
+        """
+        A method which writes the pending check-ins in one transaction.
+
+        Parameters
+        ----------
+        connection: pymysql.connections.Connection
+            Database connection object.
+
+        Returns
+        -------
+        int:
+            Number of check-ins written.
+        """
+
+        with self.lock:
+            batch, self.pending = self.pending, []
+        if not batch:
+            return 0
+
+        try:
+            with instrument.stage("query", "attendance batch") as info:
+                cursor = connection.cursor()
+                cursor.executemany(INSERT_ATTENDANCE, batch)
+                connection.commit()
+                cursor.close()
+                info["rows"] = len(batch)
+        except Exception:
+            # Keep the batch so it is retried on the next flush
+            with self.lock:
+                self.pending = batch + self.pending
+            try:
+                connection.rollback()
+            except pymysql.err.Error as rollback_err:
+                # The connection is gone, it is reopened before the next flush
+                logging.warning("Rollback failed: {}".format(rollback_err))
+            raise
+        return len(batch)
+
+    def write_back(self):
+        connection = None
+        table_created = False
+
+        while True:
+            self.wake.wait(self.interval)
+            self.wake.clear()
+            stopping = self.stopped.is_set()
+
+            try:
+                if connection is None:
+                    connection = self.connect()
+                else:
+                    # Reconnect if the server dropped the connection since the last flush
+                    connection.ping(reconnect=True)
+                if not table_created:
+                    cursor = connection.cursor()
+                    cursor.execute(ATTENDANCE_TABLE)
+                    cursor.close()
+                    table_created = True
+                self.flush(connection)
+            except Exception as ex:
+                logging.exception(str(ex))
+                with self.lock:
+                    pending = len(self.pending)
+                print("Check-in write back failed with {} check-ins pending: {}".format(pending, ex))
+
+            if stopping:
+                break
+
+        with self.lock:
+            pending = len(self.pending)
+        if pending:
+            print("{} check-ins of {} were not written back".format(pending, self.event))
+
+        if connection is not None:
+            try:
+                connection.close()
+            except pymysql.err.Error:
+                pass
+
+    def stop(self):
+        self.stopped.set()
+        self.wake.set()
+        if self.writer.is_alive():
+            self.writer.join()
+
+
+def load_participants(connection, event):
+    """
+    A function which loads the participants of an event.
+
+    Parameters
+    ----------
+    connection: pymysql.connections.Connection
+        Database connection object.
+
+    event: str
+        Name of the event.
+
+    Returns
+    -------
+    dict:
+        Receipt key -> dict of `receipt_no`, combined `names` and `mobile`.
+    """
+
+    df = loader.read_typed(PARTICIPANTS_QUERY.format(event), connection)
+    names = df[NAME_COLUMNS].fillna("").astype(str)
+    combined = names["name_1"]
+    for column in NAME_COLUMNS[1:]:
+        combined = combined + "\n" + names[column]
+
+    return {
+        receipt_key(receipt_no): {"receipt_no": receipt_no, "names": name.strip(),
+                                  "mobile": None if pd.isna(mobile) else str(mobile)}
+        for receipt_no, name, mobile in zip(df["receipt_no"], combined, df["mobile"].astype(object))
+        if not pd.isna(receipt_no)
+    }
+
+
+def load_attendance(connection, event):
+    """
+    A function which loads the check-ins of an event already written
+    to the `attendance` table, creating the table if needed.
+
+    Parameters
+    ----------
+    connection: pymysql.connections.Connection
+        Database connection object.
+
+    event: str
+        Name of the event.
+
+    Returns
+    -------
+    dict:
+        Receipt key -> check-in time.
+    """
+
+    cursor = connection.cursor()
+    cursor.execute(ATTENDANCE_TABLE)
+    cursor.execute(ATTENDANCE_QUERY, (event,))
+    checked_in = {receipt_key(receipt_no): checked_in_at for receipt_no, checked_in_at in cursor.fetchall()}
+    cursor.close()
+    return checked_in
+
+
+def make_handler(checkin):
+    class CheckInHandler(BaseHTTPRequestHandler):
+        """Serves `POST /checkin/<receipt no>` and `GET /participants`"""
+
+        def send_json(self, status, data):
+            body = json.dumps(data).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_POST(self):
+            if not self.path.startswith("/checkin/"):
+                self.send_error(404)
+                return
+            receipt_no = unquote(self.path[len("/checkin/"):])
+            status, participant = checkin.mark(receipt_no)
+            self.send_json(404 if status == "unknown" else 200,
+                           {"status": status, "receipt_no": receipt_no, "participant": participant})
+
+        def do_GET(self):
+            if self.path != "/participants":
+                self.send_error(404)
+                return
+            with checkin.lock:
+                checked_in = dict(checkin.checked_in)
+            self.send_json(200, [
+                dict(participant, checked_in_at=str(checked_in[key]) if key in checked_in else None)
+                for key, participant in checkin.participants.items()
+            ])
+
+        def log_message(self, format, *args):
+            pass
+
+    return CheckInHandler
+
+
+def load_test(checkin, volunteers=20, scans=5000):
+    """
+    A function which simulates volunteers scanning receipts concurrently
+    against the HTTP service, started on a free local port. Some scans
+    are repeats and about one in twenty is an unknown receipt.
+
+    Parameters
+    ----------
+    checkin: CheckIn
+        The check-in service.
+
+    volunteers: int
+        Number of concurrent volunteers.
+
+    scans: int
+        Total number of scans.
+
+    Returns
+    -------
+    dict:
+        Counts per status, seconds taken and scans per second.
+    """
+
+    receipts = [participant["receipt_no"] for participant in checkin.participants.values()]
+    rand = random.Random(17)
+    # Every scan is unknown for an event without participants
+    scans_list = [rand.choice(receipts) if receipts and rand.random() < 0.95 else "UNKNOWN/{}".format(i)
+                  for i in range(scans)]
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(checkin))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = "http://127.0.0.1:{}/checkin/".format(server.server_address[1])
+
+    def scan(receipt_no):
+        request = urllib.request.Request(url + quote(receipt_no, safe=""), method="POST")
+        try:
+            with urllib.request.urlopen(request) as response:
+                return json.load(response)["status"]
+        except urllib.error.HTTPError as http_err:
+            return json.load(http_err)["status"]
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=volunteers) as executor:
+        statuses = list(executor.map(scan, scans_list))
+    seconds = time.perf_counter() - start
+
+    server.shutdown()
+    server.server_close()
+    checkin.stop()
+
+    counts = {status: statuses.count(status) for status in ("ok", "duplicate", "unknown")}
+    counts.update(seconds=round(seconds, 4), per_second=round(scans / seconds) if seconds else None)
+    return counts
+
+
+def main():
+    try:
+        logging.basicConfig(filename="logs.log", filemode="a", level=logging.DEBUG,
+                            format="\n%(asctime)s  %(levelname)s: %(message)s")
+        instrument.start("checkin")
+        config = get_config(os.path.join(os.path.abspath("."), "config.json"))
+        command, event = sys.argv[1], sys.argv[2]
+
+        # Attendance is only written back when asked, e.g. against a stand-in database
+        write_back = command == "serve" or "--write-back" in sys.argv[3:]
+
+        connection = get_connection(config)
+        participants = load_participants(connection, event)
+        # Earlier check-ins of the event, e.g. before a restart
+        checked_in = load_attendance(connection, event) if write_back else {}
+        connection.close()
+
+        if command == "serve":
+            port = int(sys.argv[3]) if len(sys.argv) > 3 else 8018
+            host = sys.argv[4] if len(sys.argv) > 4 else "127.0.0.1"
+            checkin = CheckIn(event, participants, lambda: get_connection(config), checked_in=checked_in)
+            checkin.start()
+            server = ThreadingHTTPServer((host, port), make_handler(checkin))
+            print("Check-in for {} participants of {} ({} checked in) on http://{}:{}".format(
+                len(participants), event, len(checked_in), host, port))
+            try:
+                server.serve_forever()
+            except KeyboardInterrupt:
+                server.server_close()
+            finally:
+                checkin.stop()
+
+        elif command == "loadtest":
+            args = [arg for arg in sys.argv[3:] if arg != "--write-back"]
+            volunteers = int(args[0]) if len(args) > 0 else 20
+            scans = int(args[1]) if len(args) > 1 else 5000
+            connect = (lambda: get_connection(config)) if write_back else None
+            checkin = CheckIn(event, participants, connect, checked_in=checked_in)
+            checkin.start()
+            print(load_test(checkin, volunteers, scans))
+
+    except FileNotFoundError as file_err:
+        logging.exception(str(file_err))
+    except json.decoder.JSONDecodeError as json_err:
+        logging.exception(str(json_err))
+    except KeyError as key_err:
+        logging.exception(str(key_err))
+    except pymysql.err.Error as pymysql_err:
+        logging.exception(pymysql_err)
+    except Exception as ex:
+        logging.exception(str(ex))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,195 @@
+"""Streaming compressed writers for CSV exports and zip archives"""
+
+import io
+import gzip
+import json
+import zipfile
+
+# Codec -> (file extension, default level)
+CODECS = {
+    "none": ("", None),
+    "gzip": (".gz", 6),
+    "zstd": (".zst", 3),
+}
+
+# Zip compression name -> zipfile constant
+ZIP_METHODS = {
+    "stored": zipfile.ZIP_STORED,
+    "deflate": zipfile.ZIP_DEFLATED,
+    "bzip2": zipfile.ZIP_BZIP2,
+    "lzma": zipfile.ZIP_LZMA,
+}
+
+
+def get_codec(file_name="config.json", default="gzip"):
+    """
+    A function which reads the codec and level of the CSV exports
+    from the `csv_compression` and `csv_compression_level` keys of the
+    configuration file.
+
+    Parameters
+    ----------
+    file_name: str
+        Path of JSON configuration file.
+
+    default: str
+        Codec used when the file or the key is missing.
+
+    Returns
+    -------
+    tuple:
+        The codec and the level, or None for the codec's default level.
+
+    Raises
+    ------
+    ValueError:
+        When the codec is unknown.
+    """
+
+    try:
+        with open(file_name) as config_file:
+            config = json.load(config_file)
+    except FileNotFoundError:
+        config = {}
+
+    codec = config.get("csv_compression", default)
+    if codec not in CODECS:
+        raise ValueError("Unknown codec {}, expected one of {}".format(codec, sorted(CODECS)))
+    return codec, config.get("csv_compression_level")
+
+
+def open_output(file_name, codec="gzip", level=None):
+    """
+    A function which opens a text stream writing compressed data
+    straight to a file, without an uncompressed copy on disk.
+
+    Parameters
+    ----------
+    file_name: str
+        Path of the target file without the codec extension.
+
+    codec: str
+        One of `none`, `gzip` or `zstd`. zstd needs the optional
+        `zstandard` package.
+
+    level: int
+        Compression level, or None for the codec's default.
+
+    Returns
+    -------
+    tuple:
+        The text stream and the path of the written file.
+
+    Raises
+    ------
+    ValueError:
+        When the codec is unknown.
+
+    ImportError:
+        When zstd is selected and `zstandard` is not installed.
+    """
+
+    if codec not in CODECS:
+        raise ValueError("Unknown codec {}, expected one of {}".format(codec, sorted(CODECS)))
+
+    extension, default_level = CODECS[codec]
+    level = default_level if level is None else level
+    path = file_name + extension
+
+    if codec == "gzip":
+        return gzip.open(path, "wt", compresslevel=level, encoding="utf-8", newline=""), path
+    if codec == "zstd":
+        import zstandard
+
+        raw_file = open(path, "wb")
+        try:
+            raw = zstandard.ZstdCompressor(level=level).stream_writer(raw_file, closefd=True)
+            return io.TextIOWrapper(raw, encoding="utf-8", newline=""), path
+        except Exception:
+            raw_file.close()
+            raise
+    return open(path, "w", encoding="utf-8", newline=""), path
+
+
+def to_csv(df, file_name, codec="gzip", level=None, **kwargs):
+    """
+    A function which streams a DataFrame as CSV through a compressor.
+
+    Parameters
+    ----------
+    df: pandas.core.frame.DataFrame
+        The DataFrame to write.
+
+    file_name: str
+        Path of the target file without the codec extension.
+
+    codec: str
+        One of `none`, `gzip` or `zstd`.
+
+    level: int
+        Compression level, or None for the codec's default.
+
+    kwargs:
+        Remaining keyword arguments of `DataFrame.to_csv`.
+
+    Returns
+    -------
+    str:
+        Path of the written file.
+    """
+
+    stream, path = open_output(file_name, codec, level)
+    with stream:
+        df.to_csv(stream, **kwargs)
+    return path
+
+
+def open_zip(file_name, method="deflate", level=None):
+    """
+    A function which opens a zip archive for writing with the given
+    compression method and level.
+
+    Parameters
+    ----------
+    file_name: str
+        Path of the zip file.
+
+    method: str
+        One of `stored`, `deflate`, `bzip2` or `lzma`.
+
+    level: int
+        Compression level, 0-9 for deflate and 1-9 for bzip2.
+
+    Returns
+    -------
+    zipfile.ZipFile
+    """
+
+    if method not in ZIP_METHODS:
+        raise ValueError("Unknown zip method {}, expected one of {}".format(method, sorted(ZIP_METHODS)))
+    return zipfile.ZipFile(file_name, "w", compression=ZIP_METHODS[method], compresslevel=level)
+
+
+def csv_to_zip(archive, df, name, **kwargs):
+    """
+    A function which streams a DataFrame as CSV into a member of an
+    open zip archive.
+
+    Parameters
+    ----------
+    archive: zipfile.ZipFile
+        Archive opened with `open_zip`.
+
+    df: pandas.core.frame.DataFrame
+        The DataFrame to write.
+
+    name: str
+        Name of the member in the archive.
+
+    kwargs:
+        Remaining keyword arguments of `DataFrame.to_csv`.
+    """
+
+    with archive.open(name, "w") as member:
+        with io.TextIOWrapper(member, encoding="utf-8", newline="") as stream:
+            df.to_csv(stream, **kwargs)
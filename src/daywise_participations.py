@@ -1,21 +1,32 @@
 import pandas as pd
 import pymysql
 
+import instrument
+import compression
+
+# Codec of the exported CSV files (none, gzip or zstd) and its level, from
+# csv_compression and csv_compression_level in config.json
+COMPRESSION, LEVEL = compression.get_codec()
+
+instrument.start("daywise_participations")
+
 con = pymysql.connect(host="host", db="db", user="user", passwd="password")
 cur = con.cursor()
 cur.execute("SET sql_mode = ''")
 
 # Get total number of participants in each event till date
-cur.execute("SELECT event, count(*) as total FROM participations GROUP by event order by total desc")
+instrument.execute(cur, "SELECT event, count(*) as total FROM participations GROUP by event order by total desc")
 
 df = pd.DataFrame(list(cur.fetchall()), columns=["Event name", "No. of entries"])
-df.to_csv("total.csv")
+with instrument.stage("write", "total.csv") as info:
+    path = compression.to_csv(df, "total.csv", COMPRESSION, LEVEL)
+    info.update(instrument.written(path, len(df)))
 
 # lower limit = Starting Id number
 # upper limit = Last Id number
 # event_type = Event types to exclude e.g. 'adventure'
 
-df = pd.read_sql(
+df = instrument.read_sql(
     "SELECT "
     "receipt_no, name_1, name_2, name_3, name_4, name_5, name_6, event, year, mobile "
     "FROM "
@@ -31,7 +42,9 @@ df = pd.read_sql(
 
 # Can mention date explicitly or from a config file or
 # datetime.datetime.now() if script is executed on the same day
-df.to_csv("Entries on {date}.csv")
+with instrument.stage("write", "Entries on {date}.csv") as info:
+    path = compression.to_csv(df, "Entries on {date}.csv", COMPRESSION, LEVEL)
+    info.update(instrument.written(path, len(df)))
 
 cur.close()
 con.close()
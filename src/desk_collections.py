@@ -1,8 +1,16 @@
 """A script to to find desk wise collections"""
 
+import os
+import sys
+
 import pymysql
 import pandas as pd
 
+import summaries
+import compression
+import profiling
+import instrument
+
 
 def get_desk(row):
     receipt_no = row["receipt_no"]
@@ -10,7 +18,7 @@ def get_desk(row):
 
 
 
-def save_data(connection):
+def save_data(connection, lower_limit_id=0, upper_limit_id=sys.maxsize, output_dir=".", codec="gzip", level=None):
     select = "SELECT " \
              "p.id, p.receipt_no, p.event, e.fees " \
              "FROM " \
@@ -24,24 +32,53 @@ def save_data(connection):
              "AND " \
              "id <= {upper_limit_id}"
 
-    df = pd.read_sql(select, connection)
+    df = instrument.read_sql(select.format(lower_limit_id=lower_limit_id, upper_limit_id=upper_limit_id),
+                             connection)
     df["desk"] = df.apply(lambda row: get_desk(row), axis=1)
-    df.to_csv("DD-MM-YYYY.csv", index=False, encoding="utf-8")
+    file_name = os.path.join(output_dir, "DD-MM-YYYY.csv")
+    with instrument.stage("write", file_name) as info:
+        path = compression.to_csv(df, file_name, codec, level, index=False)
+        info.update(instrument.written(path, len(df)))
+    return path
 
 
-def get_desk_collections(file_path):
-    df = pd.read_csv(file_path, encoding="iso-8859-1")
+def get_desk_collections(file_path, output_dir="."):
+    # The compression is inferred from the file extension
+    df = pd.read_csv(file_path, encoding="utf-8")
     desks = df.groupby(["desk"])
-    desks["fees"].sum().to_csv("DD-MM-YYYY collections.csv")
+    file_name = os.path.join(output_dir, "DD-MM-YYYY collections.csv")
+    with instrument.stage("write", file_name) as info:
+        collections = desks["fees"].sum()
+        collections.to_csv(file_name)
+        info.update(instrument.written(file_name, len(collections)))
+
+
+def get_summary_collections(connection):
+    df = instrument.read_sql(summaries.DESKS_QUERY, connection)
+    with instrument.stage("write", "DD-MM-YYYY collections.csv") as info:
+        df.to_csv("DD-MM-YYYY collections.csv", index=False)
+        info.update(instrument.written("DD-MM-YYYY collections.csv", len(df)))
+
+
+def collections(connection, output_dir=".", codec="gzip", level=None):
+    file_path = save_data(connection, output_dir=output_dir, codec=codec, level=level)
+    get_desk_collections(file_path, output_dir)
+    return file_path
 
 
 def main():
+    instrument.start("desk_collections")
     con = pymysql.connect(host="host", db="db", user="user", passwd="password")
-    save_data(con)
+    if "--summary" in sys.argv[1:]:
+        # Read the totals maintained by summaries.py
+        get_summary_collections(con)
+        con.close()
+        return
+    # Codec of the exported CSV file, from csv_compression in config.json
+    codec, level = compression.get_codec()
+    collections(con, codec=codec, level=level)
     con.close()
-    file_path = "DD-MM-YYYY.csv"
-    get_desk_collections(file_path)
 
 
 if __name__ == '__main__':
-    main()
+    profiling.run(main, 'desk_collections')
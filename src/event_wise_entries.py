@@ -1,8 +1,16 @@
+import sys
 import json
-import pymysql
+import time
+import logging
 import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+import pymysql
 import requests
-import pandas as pd
+
+import summaries
+import profiling
+import instrument
 
 
 CONFIG_FILE = "config.json"
@@ -72,9 +80,9 @@ def disable_group_by(connection):
         print(ex)
 
 
-def save_csv(connection, query, columns, name):
+def build_csv(connection, query, columns):
     """
-        A function to save CSV file created from data
+        A function to build a CSV document in memory from data
         fetched from a MySQL database.
 
         Parameters
@@ -89,19 +97,79 @@ def save_csv(connection, query, columns, name):
         columns: list
             List of column names.
 
-        name: str
-            Name of the target CSV file.
+        Returns
+        -------
+
+        bytes:
+            UTF-8 encoded contents of the CSV file.
     """
 
-    try:
-        df = pd.read_sql(query, connection, columns=columns)
-        df.to_csv(name, index=False)
-    except Exception as ex:
-        print(type(ex))
-        print(ex)
+    df = instrument.read_sql(query, connection)
+    df.columns = columns
+    with instrument.stage("write", "CSV in memory") as info:
+        document = df.to_csv(index=False).encode("utf-8")
+        info.update(rows=len(df), bytes=len(document))
+    return document
+
+
+def build_entries(connection, last_id=None, database=None, summary=False):
+    """
+        A function to build the CSV document of the entries of
+        every event up to a participation id.
+
+        Parameters
+        ----------
+
+        connection: pymysql.connections.Connection
+            Connection object of the MySQL database connection.
+
+        last_id: int
+            Last participation id counted, or None to count every
+            participation.
+
+        database: str
+            Name of the database, or None for the connection's default.
+
+        summary: bool
+            Read the counts maintained by summaries.py. They are used
+            only when their last refresh covered every participation and
+            no participation is above `last_id`, as they have no cutoff.
+            Otherwise the entries are counted from the participations.
 
+        Returns
+        -------
 
-def send_mail(api_url, user, key, sender, receiver, subject, text, file_name):
+        bytes:
+            UTF-8 encoded contents of the CSV file.
+    """
+
+    if summary:
+        cursor = connection.cursor()
+        cursor.execute("SELECT COALESCE(MAX(id), 0) FROM participations")
+        max_id = cursor.fetchone()[0]
+        cursor.close()
+        refreshed = summaries.refreshed_id(connection)
+
+        if refreshed is None or refreshed < max_id:
+            summary = False
+            print("Summary tables were refreshed up to id {} of {}, counting entries without them".format(
+                refreshed, max_id))
+        elif last_id is not None and max_id > last_id:
+            summary = False
+            print("Participations above id {} exist, counting entries without the summary tables".format(last_id))
+
+    if summary:
+        # Read the counts maintained by summaries.py
+        query = summaries.EVENTS_QUERY
+    else:
+        table = "{}.participations".format(database) if database else "participations"
+        cutoff = "WHERE id <= {} ".format(int(last_id)) if last_id is not None else ""
+        query = "SELECT event, COUNT(*) AS `entries` FROM {} {}" \
+                "GROUP BY event ORDER BY`entries` DESC;".format(table, cutoff)
+    return build_csv(connection, query, ["Event Name", "No. of entries"])
+
+
+def send_mail(api_url, user, key, sender, receiver, subject, text, file_name, attachment):
     """
         A to send Email with an attachment using
         Mailgun API.
@@ -132,6 +200,9 @@ def send_mail(api_url, user, key, sender, receiver, subject, text, file_name):
 
         file_name: str
             Name of the attachment file.
+
+        attachment: bytes
+            Contents of the attachment file.
     """
 
     authorization = (user, key)
@@ -144,7 +215,7 @@ def send_mail(api_url, user, key, sender, receiver, subject, text, file_name):
     try:
         return requests.post(api_url,
                              auth=authorization,
-                             files=[("attachment", (file_name, open(file_name, "rb").read()))],
+                             files=[("attachment", (file_name, attachment))],
                              data=data
                              )
     except Exception as ex:
@@ -152,9 +223,47 @@ def send_mail(api_url, user, key, sender, receiver, subject, text, file_name):
         print(ex)
 
 
+def send_mails(receivers, workers=4, **kwargs):
+    """
+        A function to send the same Email to several receivers
+        concurrently. The attachment bytes are shared by every send.
+
+        Parameters
+        ----------
+
+        receivers: list
+            List of receivers in `Name <email>` format.
+
+        workers: int
+            Maximum number of concurrent API calls.
+
+        kwargs:
+            Remaining keyword arguments of `send_mail`.
+
+        Returns
+        -------
+
+        list:
+            Tuples of receiver and `requests.Response`, in the
+            order of `receivers`.
+    """
+
+    def send(receiver):
+        start = time.perf_counter()
+        response = instrument.api_call("mailgun {}".format(receiver), send_mail, receiver=receiver, **kwargs)
+        logging.info("Mail to {} took {:.3f}s".format(receiver, time.perf_counter() - start))
+        return receiver, response
+
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(receivers)))) as executor:
+        return list(executor.map(send, receivers))
+
+
 def main():
-    # TODO - Add Logging facility
+    logging.basicConfig(filename="logs.log", filemode="a", level=logging.DEBUG,
+                        format="\n%(asctime)s  %(levelname)s: %(message)s")
     try:
+        pipeline_start = time.perf_counter()
+        instrument.start("event_wise_entries")
         config = get_config(CONFIG_FILE)
 
         host = config["mysql_host"]
@@ -165,32 +274,48 @@ def main():
         con = pymysql.connect(host=host, user=user, passwd=password, db=database)
 
         disable_group_by(con)
-        query = "SELECT event, COUNT(*) AS `entries` FROM {}.participations WHERE id <= {last_id} " \
-                "GROUP BY event ORDER BY`entries` DESC;".format(database)
-        columns = ["Event Name", "No. of entries"]
 
         current_date = str(datetime.date.today()).split(".")[0]
         name = CSV_FILE.format(current_date)
-        save_csv(con, query, columns, name)
-
-        url = config["mailgun_api"]
-        user = config["mailgun_user"]
-        key = config["mailgun_key"]
-        sender = config["mailgun_sender"]
-        receiver = config["receiver"]
-        subject = "Total entries up to {}".format(current_date)
-        text = config["text"]
-
-        response = send_mail(url, user, key, sender, receiver, subject, text, name)
-        print(response.status_code)
-        print(response.json())
 
+        stage_start = time.perf_counter()
+        # Without last_id every participation is counted
+        attachment = build_entries(con, config.get("last_id"), database, "--summary" in sys.argv[1:])
         con.close()
+        logging.info("Built {} ({} bytes) in {:.3f}s".format(name, len(attachment),
+                                                             time.perf_counter() - stage_start))
+
+        receivers = config["receiver"]
+        if isinstance(receivers, str):
+            receivers = [receivers]
+
+        stage_start = time.perf_counter()
+        responses = send_mails(
+            receivers,
+            workers=config.get("mail_workers", 4),
+            api_url=config.get("mailgun_api_url", config.get("mailgun_api")),
+            user=config["mailgun_user"],
+            key=config["mailgun_key"],
+            sender=config["mailgun_sender"],
+            subject="Total entries up to {}".format(current_date),
+            text=config["text"],
+            file_name=name,
+            attachment=attachment
+        )
+        logging.info("Sent {} mails in {:.3f}s".format(len(responses), time.perf_counter() - stage_start))
+
+        for receiver, response in responses:
+            if response is not None:
+                print(receiver, response.status_code)
+                print(response.json())
+
+        logging.info("Pipeline finished in {:.3f}s".format(time.perf_counter() - pipeline_start))
 
     except Exception as ex:
+        logging.exception(str(ex))
         print(type(ex))
         print(ex)
 
 
 if __name__ == '__main__':
-    main()
+    profiling.run(main, 'event_wise_entries')
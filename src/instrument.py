@@ -0,0 +1,278 @@
+"""A lightweight instrumentation layer to time database queries, file writes and API calls"""
+
+import os
+import sys
+import json
+import time
+import atexit
+import logging
+import datetime
+import threading
+from contextlib import contextmanager
+
+# Directory in which the JSON summary of every run is written
+SUMMARY_DIR = "timings"
+
+# Number of most recent stages kept in the summary. Totals still cover every
+# stage, so long running processes such as the refresh daemon stay bounded.
+MAX_STAGES = 1000
+
+_lock = threading.Lock()
+
+_run = {
+    "script": None,
+    "started": None,
+    "start": None,
+    "totals": {},
+    "dropped": 0,
+    "stages": []
+}
+
+
+def start(script):
+    """
+    A function which starts recording a run of a script. The JSON
+    summary of the run is written when the interpreter exits.
+
+    Parameters
+    ----------
+    script: str
+        Name of the script being run.
+    """
+
+    _run["script"] = script
+    _run["started"] = datetime.datetime.now().isoformat(timespec="seconds")
+    _run["start"] = time.perf_counter()
+    _run["totals"] = {}
+    _run["dropped"] = 0
+    _run["stages"] = []
+    atexit.register(save_summary)
+
+
+def record(kind, name, seconds, rows=None, size=None):
+    """
+    A function which records one measured stage of the run.
+
+    Parameters
+    ----------
+    kind: str
+        Type of the stage, e.g. `query`, `write` or `api`.
+
+    name: str
+        Description of the stage such as the query or file name.
+
+    seconds: float
+        Wall time taken by the stage.
+
+    rows: int
+        Number of rows read or written, if known.
+
+    size: int
+        Number of bytes read, written or transferred, if known.
+    """
+
+    stage = {"kind": kind, "name": name, "seconds": round(seconds, 6), "rows": rows, "bytes": size}
+    with _lock:
+        total = _run["totals"].setdefault(kind, {"count": 0, "seconds": 0.0, "rows": 0, "bytes": 0})
+        total["count"] += 1
+        total["seconds"] = round(total["seconds"] + stage["seconds"], 6)
+        total["rows"] += rows or 0
+        total["bytes"] += size or 0
+
+        _run["stages"].append(stage)
+        if len(_run["stages"]) > MAX_STAGES:
+            del _run["stages"][0]
+            _run["dropped"] += 1
+    logging.info("{kind} took {seconds:.3f}s rows={rows} bytes={bytes}: {name}".format(**stage))
+
+
+@contextmanager
+def stage(kind, name):
+    """
+    A context manager which times the enclosed block and records it.
+    The yielded dict may be filled with `rows` and `bytes`.
+
+    Parameters
+    ----------
+    kind: str
+        Type of the stage, e.g. `query`, `write` or `api`.
+
+    name: str
+        Description of the stage such as the query or file name.
+    """
+
+    info = {"rows": None, "bytes": None}
+    begin = time.perf_counter()
+    try:
+        yield info
+    finally:
+        record(kind, name, time.perf_counter() - begin, info["rows"], info["bytes"])
+
+
+def read_sql(query, connection):
+    """
+    A function which executes a query with `pandas.read_sql`
+    and records its time, rows and memory size.
+
+    Parameters
+    ----------
+    query: str
+        The SQL query to be executed on the database.
+
+    connection: pymysql.connections.Connection
+        Database connection object.
+
+    Returns
+    -------
+    pandas.core.frame.DataFrame
+        DataFrame containing the results of the query.
+    """
+
+    import pandas as pd
+
+    with stage("query", query) as info:
+        df = pd.read_sql(query, connection)
+        info["rows"] = len(df)
+        info["bytes"] = int(df.memory_usage(index=True, deep=True).sum())
+    return df
+
+
+def execute(cursor, query):
+    """
+    A function which executes a query on a cursor and records
+    its time and affected rows.
+
+    Parameters
+    ----------
+    cursor: pymysql.cursors.Cursor
+        Cursor of the database connection.
+
+    query: str
+        The SQL query to be executed on the database.
+
+    Returns
+    -------
+    int:
+        Number of affected rows.
+    """
+
+    with stage("query", query) as info:
+        info["rows"] = cursor.execute(query)
+    return info["rows"]
+
+
+def written(path, rows=None):
+    """
+    A function which records the size of a file after it has
+    been written inside a `stage("write", ...)` block.
+
+    Parameters
+    ----------
+    path: str
+        Path of the written file.
+
+    rows: int
+        Number of rows written, if known.
+
+    Returns
+    -------
+    dict:
+        Values for the `rows` and `bytes` of the stage.
+    """
+
+    return {"rows": rows, "bytes": file_size(path)}
+
+
+def file_size(path):
+    """
+    A function which returns the size of a file read or written
+    by a stage.
+
+    Parameters
+    ----------
+    path: str
+        Path of the file.
+
+    Returns
+    -------
+    int:
+        Size of the file in bytes, or None if it does not exist.
+    """
+
+    return os.path.getsize(path) if os.path.exists(path) else None
+
+
+def api_call(name, func, *args, **kwargs):
+    """
+    A function which calls an HTTP API function and records its
+    time and the size of the response body.
+
+    Parameters
+    ----------
+    name: str
+        Description of the API call.
+
+    func: callable
+        Function performing the call and returning a `requests.Response`.
+
+    Returns
+    -------
+    requests.Response:
+        Response of the API call.
+    """
+
+    with stage("api", name) as info:
+        response = func(*args, **kwargs)
+        if response is not None:
+            info["bytes"] = len(response.content)
+    return response
+
+
+def summary():
+    """
+    A function which summarises the recorded stages of the run.
+
+    Returns
+    -------
+    dict:
+        Total time of the run, totals per kind of stage and the
+        last `MAX_STAGES` recorded stages.
+    """
+
+    with _lock:
+        totals = {kind: dict(total) for kind, total in _run["totals"].items()}
+        stages = list(_run["stages"])
+        dropped = _run["dropped"]
+
+    elapsed = time.perf_counter() - _run["start"] if _run["start"] is not None else 0.0
+
+    return {
+        "script": _run["script"] or os.path.basename(sys.argv[0]),
+        "started": _run["started"],
+        "seconds": round(elapsed, 6),
+        "totals": totals,
+        "dropped_stages": dropped,
+        "stages": stages
+    }
+
+
+def save_summary():
+    """
+    A function which writes the JSON summary of the run to
+    `SUMMARY_DIR/<script>_<timestamp>.json`.
+
+    Returns
+    -------
+    str:
+        Path of the summary file.
+    """
+
+    data = summary()
+    os.makedirs(SUMMARY_DIR, exist_ok=True)
+    stamp = (_run["started"] or datetime.datetime.now().isoformat(timespec="seconds")).replace(":", "")
+    path = os.path.join(SUMMARY_DIR, "{}_{}.json".format(data["script"], stamp))
+
+    with open(path, "w") as summary_file:
+        json.dump(data, summary_file, indent=2)
+
+    return path
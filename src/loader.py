@@ -0,0 +1,156 @@
+"""A python script to load participations with compact column types
+
+Usage: python src/loader.py
+    Loads the full participations table and reports the memory saved.
+"""
+
+import os
+import json
+import logging
+
+import pymysql
+import pandas as pd
+
+import profiling
+import instrument
+
+# Column name -> compact type. Columns which repeat a few values on
+# every row become categoricals, numeric columns become nullable ints.
+COLUMN_TYPES = {
+    "id": "Int32",
+    "event": "category",
+    "year": "category",
+    "type": "category",
+    "department": "category",
+    "desk": "category",
+    "fees": "Int32",
+    "team_size": "Int8",
+    "mobile": "Int64",
+}
+
+
+def get_config(file_name):
+    """
+    A function which takes the path of the configuration
+    file and returns a config object.
+
+    Parameters
+    ----------
+    file_name: str
+        Path of JSON configuration file.
+
+    Returns
+    -------
+    config: dict
+        Dictionary object created from JSON configuration.
+    """
+
+    with open(file_name) as config_file:
+        return json.load(config_file)
+
+
+def memory_usage(df):
+    """
+    A function which returns the deep memory usage of a DataFrame.
+
+    Parameters
+    ----------
+    df: pandas.core.frame.DataFrame
+        The DataFrame to measure.
+
+    Returns
+    -------
+    int:
+        Memory used by the DataFrame in bytes.
+    """
+
+    return int(df.memory_usage(index=True, deep=True).sum())
+
+
+def compact(df):
+    """
+    A function which converts the known columns of a DataFrame to
+    the compact types of `COLUMN_TYPES`. Other columns are left as is.
+
+    Parameters
+    ----------
+    df: pandas.core.frame.DataFrame
+        DataFrame loaded from the `participations` or `events` tables.
+
+    Returns
+    -------
+    pandas.core.frame.DataFrame
+        The same DataFrame with converted columns.
+    """
+
+    for column, dtype in COLUMN_TYPES.items():
+        if column not in df.columns:
+            continue
+        if dtype == "category":
+            df[column] = df[column].astype("category")
+        else:
+            # Mobile numbers may come back as float, str or with NaNs
+            df[column] = pd.to_numeric(df[column], errors="coerce").round().astype(dtype)
+    return df
+
+
+def read_typed(query, connection):
+    """
+    A function which executes a query and returns its results
+    with compact column types.
+
+    Parameters
+    ----------
+    query: str
+        The SQL query to be executed on the database.
+
+    connection: pymysql.connections.Connection
+        Database connection object.
+
+    Returns
+    -------
+    pandas.core.frame.DataFrame
+        DataFrame containing the results of the query.
+    """
+
+    df = instrument.read_sql(query, connection)
+    before = memory_usage(df)
+    df = compact(df)
+    after = memory_usage(df)
+    logging.info("Compact types saved {} of {} bytes".format(before - after, before))
+    return df
+
+
+def main():
+    try:
+        logging.basicConfig(filename="logs.log", filemode="a", level=logging.DEBUG,
+                            format="\n%(asctime)s  %(levelname)s: %(message)s")
+        config = get_config(os.path.join(os.path.abspath("."), "config.json"))
+
+        connection = pymysql.connect(host=config["mysql_host"], user=config["mysql_user"],
+                                     passwd=config["mysql_pass"], db=config["mysql_db"])
+
+        df = instrument.read_sql("SELECT * FROM participations", connection)
+        connection.close()
+
+        before = memory_usage(df)
+        after = memory_usage(compact(df))
+        print("Rows: {}".format(len(df)))
+        print("Default types: {:.1f} MB".format(before / 2 ** 20))
+        print("Compact types: {:.1f} MB".format(after / 2 ** 20))
+        print("Saved: {:.1f} MB ({:.0%})".format((before - after) / 2 ** 20, 1 - after / max(before, 1)))
+
+    except FileNotFoundError as file_err:
+        logging.exception(str(file_err))
+    except json.decoder.JSONDecodeError as json_err:
+        logging.exception(str(json_err))
+    except KeyError as key_err:
+        logging.exception(str(key_err))
+    except pymysql.err.Error as pymysql_err:
+        logging.exception(pymysql_err)
+    except Exception as ex:
+        logging.exception(str(ex))
+
+
+if __name__ == '__main__':
+    profiling.run(main, 'loader')
@@ -0,0 +1,244 @@
+"""A python script to look up participations by receipt number or mobile number
+
+Usage:
+    python src/lookup.py build
+    python src/lookup.py receipt <receipt no>
+    python src/lookup.py mobile <mobile no>
+    python src/lookup.py serve [port]
+
+The index is a local hash file built from `participations` and refreshed
+incrementally with the rows above the last indexed id. `serve` answers
+`GET /receipt/<receipt no>` and `GET /mobile/<mobile no>` with JSON.
+
+`serve` opens the index on every request instead of holding it, so `build`
+or the refresh daemon can update it while the server runs and the next
+request sees the new rows.
+"""
+
+import os
+import re
+import sys
+import dbm
+import json
+import logging
+from urllib.parse import unquote
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+INDEX_FILE = "lookup.db"
+LAST_ID_KEY = "__last_id__"
+
+QUERY = "SELECT id, receipt_no, event, name_1, name_2, name_3, name_4, name_5, name_6, mobile " \
+        "FROM participations WHERE id > {} ORDER BY id"
+
+NAME_COLUMNS = ["name_1", "name_2", "name_3", "name_4", "name_5", "name_6"]
+
+
+def get_config(file_name):
+    """
+    A function which takes the path of the configuration
+    file and returns a config object.
+
+    Parameters
+    ----------
+    file_name: str
+        Path of JSON configuration file.
+
+    Returns
+    -------
+    config: dict
+        Dictionary object created from JSON configuration.
+    """
+
+    with open(file_name) as config_file:
+        return json.load(config_file)
+
+
+def receipt_key(receipt_no):
+    return "r:" + receipt_no.strip().upper()
+
+
+def mobile_key(mobile):
+    # Same rules as recipients.normalize_mobiles without importing pandas
+    try:
+        number = float(mobile)
+    except (TypeError, ValueError):
+        number = None
+    if number is not None and number.is_integer():
+        # Whole numbers only, so 9876543210.0 becomes "9876543210"
+        digits = str(int(number))
+    else:
+        digits = re.sub(r"\D", "", str(mobile))
+    match = re.fullmatch(r"(?:91|0)?([6-9]\d{9})", digits)
+    return "m:+91" + match.group(1) if match else None
+
+
+def refresh(connection, file_name=INDEX_FILE):
+    """
+    A function which adds the participations above the last indexed
+    id to the index file, creating it if needed.
+
+    Parameters
+    ----------
+    connection: pymysql.connections.Connection
+        Database connection object.
+
+    file_name: str
+        Path of the index file.
+
+    Returns
+    -------
+    int:
+        Number of participations added.
+    """
+
+    import pandas as pd
+
+    import instrument
+    import recipients
+
+    with dbm.open(file_name, "c") as index:
+        last_id = int(index.get(LAST_ID_KEY, b"0"))
+        df = instrument.read_sql(QUERY.format(last_id), connection)
+        if df.empty:
+            return 0
+
+        names = df[NAME_COLUMNS].fillna("").astype(str)
+        mobiles = recipients.normalize_mobiles(df["mobile"])
+
+        # Group the new records per key before merging them into the file
+        additions = {}
+        for row, row_names, mobile in zip(df.itertuples(index=False), names.itertuples(index=False), mobiles):
+            if pd.isna(row.receipt_no):
+                logging.warning("Participation {} has no receipt number and is not indexed".format(row.id))
+                continue
+            record = {
+                "id": int(row.id),
+                "receipt_no": row.receipt_no,
+                "event": row.event,
+                "names": [name for name in row_names if name],
+                "mobile": None if pd.isna(mobile) else mobile
+            }
+            additions.setdefault(receipt_key(row.receipt_no), []).append(record)
+            if record["mobile"]:
+                additions.setdefault("m:" + record["mobile"], []).append(record)
+
+        for key, records in additions.items():
+            existing = json.loads(index[key]) if key in index else []
+            index[key] = json.dumps(existing + records)
+
+        index[LAST_ID_KEY] = str(int(df["id"].max()))
+
+    logging.info("Lookup index refreshed with {} participations after id {}".format(len(df), last_id))
+    return len(df)
+
+
+def find(index, key):
+    """
+    A function which returns the participations stored under a key.
+
+    Parameters
+    ----------
+    index: dbm database
+        The opened index file.
+
+    key: str
+        A key made by `receipt_key` or `mobile_key`.
+
+    Returns
+    -------
+    list:
+        Participation records, empty if the key is unknown.
+    """
+
+    if key is None or key not in index:
+        return []
+    return json.loads(index[key])
+
+
+class LookupHandler(BaseHTTPRequestHandler):
+    """Answers `GET /receipt/<receipt no>` and `GET /mobile/<mobile no>` from the index"""
+
+    file_name = INDEX_FILE
+
+    def do_GET(self):
+        kind, _, value = self.path.lstrip("/").partition("/")
+        value = unquote(value)
+        if kind == "receipt":
+            key = receipt_key(value)
+        elif kind == "mobile":
+            key = mobile_key(value)
+        else:
+            self.send_error(404)
+            return
+
+        # Opened per request so refreshes of the index are seen and no
+        # lock is held between requests
+        try:
+            with dbm.open(self.file_name, "r") as index:
+                records = find(index, key)
+        except dbm.error as dbm_err:
+            logging.exception(str(dbm_err))
+            self.send_error(503, "Lookup index unavailable")
+            return
+
+        body = json.dumps(records).encode("utf-8")
+        self.send_response(200 if records else 404)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logging.info(format % args)
+
+
+def main():
+    try:
+        logging.basicConfig(filename="logs.log", filemode="a", level=logging.DEBUG,
+                            format="\n%(asctime)s  %(levelname)s: %(message)s")
+        command = sys.argv[1]
+
+        if command == "build":
+            import pymysql
+
+            config = get_config(os.path.join(os.path.abspath("."), "config.json"))
+            connection = pymysql.connect(host=config["mysql_host"], user=config["mysql_user"],
+                                         passwd=config["mysql_pass"], db=config["mysql_db"])
+            print("Indexed {} new participations".format(refresh(connection)))
+            connection.close()
+
+        elif command in ("receipt", "mobile"):
+            key = receipt_key(sys.argv[2]) if command == "receipt" else mobile_key(sys.argv[2])
+            with dbm.open(INDEX_FILE, "r") as index:
+                for record in find(index, key):
+                    print("{receipt_no}\t{event}\t{mobile}\t{}".format(", ".join(record["names"]), **record))
+
+        elif command == "serve":
+            port = int(sys.argv[2]) if len(sys.argv) > 2 else 8017
+            # Fail early if the index has not been built yet
+            with dbm.open(INDEX_FILE, "r"):
+                pass
+            server = HTTPServer(("127.0.0.1", port), LookupHandler)
+            print("Serving lookups on http://127.0.0.1:{}".format(port))
+            server.serve_forever()
+
+    except dbm.error as dbm_err:
+        logging.exception(str(dbm_err))
+        print("Cannot open the index {}, run `python src/lookup.py build` first: {}".format(INDEX_FILE, dbm_err))
+    except FileNotFoundError as file_err:
+        logging.exception(str(file_err))
+        print(file_err)
+    except json.decoder.JSONDecodeError as json_err:
+        logging.exception(str(json_err))
+        print(json_err)
+    except KeyError as key_err:
+        logging.exception(str(key_err))
+        print("Missing configuration key {}".format(key_err))
+    except Exception as ex:
+        logging.exception(str(ex))
+        print(type(ex))
+        print(ex)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+"""A profiling mode for the scripts using cProfile and tracemalloc"""
+
+import os
+import sys
+import pstats
+import cProfile
+import tracemalloc
+
+# Directory in which the profiles are written
+PROFILE_DIR = "profiles"
+
+
+def run(main, name):
+    """
+    A function which runs a script's main function, profiling it when
+    `--profile` is passed on the command line. The flag is removed from
+    `sys.argv` before `main` runs.
+
+    A cProfile stats file and the top memory allocation sites from
+    tracemalloc are written to `PROFILE_DIR` and a short summary of the
+    hottest functions is printed at exit.
+
+    Parameters
+    ----------
+    main: callable
+        The main function of the script.
+
+    name: str
+        Name of the script, used for the profile file names.
+    """
+
+    if "--profile" not in sys.argv[1:]:
+        main()
+        return
+
+    sys.argv = [sys.argv[0]] + [arg for arg in sys.argv[1:] if arg != "--profile"]
+
+    profiler = cProfile.Profile()
+    tracemalloc.start()
+    try:
+        profiler.runcall(main)
+    finally:
+        snapshot = tracemalloc.take_snapshot()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        report(profiler, snapshot, peak, name)
+
+
+def report(profiler, snapshot, peak, name, top=10):
+    """
+    A function which writes the profiles and prints a summary.
+
+    Parameters
+    ----------
+    profiler: cProfile.Profile
+        The profiler which ran the script.
+
+    snapshot: tracemalloc.Snapshot
+        Snapshot of the traced memory allocations.
+
+    peak: int
+        Peak traced memory in bytes.
+
+    name: str
+        Name of the script.
+
+    top: int
+        Number of functions and allocation sites in the summary.
+    """
+
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    stats_file = os.path.join(PROFILE_DIR, "{}.prof".format(name))
+    memory_file = os.path.join(PROFILE_DIR, "{}.memory.txt".format(name))
+
+    profiler.dump_stats(stats_file)
+
+    allocations = snapshot.statistics("lineno")
+    with open(memory_file, "w") as output:
+        output.write("Peak traced memory: {:.1f} MB\n".format(peak / 2 ** 20))
+        for statistic in allocations[:50]:
+            output.write("{}\n".format(statistic))
+
+    print("\nProfile written to {} and {}".format(stats_file, memory_file), file=sys.stderr)
+    print("Hottest functions by cumulative time:", file=sys.stderr)
+    stats = pstats.Stats(profiler, stream=sys.stderr)
+    stats.sort_stats("cumulative").print_stats(top)
+
+    print("Top memory allocation sites (peak {:.1f} MB):".format(peak / 2 ** 20), file=sys.stderr)
+    for statistic in allocations[:top]:
+        print("    {}".format(statistic), file=sys.stderr)
@@ -0,0 +1,218 @@
+"""A python script to audit receipt numbers of every desk
+
+Usage: python src/receipt_audit.py
+
+Receipt numbers in `DESK/NNN` format are parsed and sorted per desk in one
+vectorized pass, reporting gaps in the sequence, duplicated receipts,
+malformed receipts and fee mismatches against `events.fees`. Set
+`paid_column` in `config.json` to the participations column holding the
+amount paid to compare it with the event fees; participations of unknown
+events are always reported as mismatches.
+"""
+
+import os
+import json
+import logging
+
+import pymysql
+import pandas as pd
+
+import profiling
+import instrument
+
+QUERY = "SELECT p.id, p.receipt_no, p.event, e.fees{paid} " \
+        "FROM " \
+        "participations p " \
+        "LEFT JOIN " \
+        "events e " \
+        "ON p.event = e.name"
+
+
+def get_config(file_name):
+    """
+    A function which takes the path of the configuration
+    file and returns a config object.
+
+    Parameters
+    ----------
+    file_name: str
+        Path of JSON configuration file.
+
+    Returns
+    -------
+    config: dict
+        Dictionary object created from JSON configuration.
+    """
+
+    with open(file_name) as config_file:
+        return json.load(config_file)
+
+
+def parse_receipts(df):
+    """
+    A function which splits receipt numbers into desk and number.
+
+    Parameters
+    ----------
+    df: pandas.core.frame.DataFrame
+        Participations with a `receipt_no` column.
+
+    Returns
+    -------
+    tuple:
+        Participations with `desk` and `number` columns sorted by desk
+        and number, and the participations with malformed receipts.
+    """
+
+    parts = df["receipt_no"].astype("string").str.strip().str.extract(r"^(?P<desk>.+)/(?P<number>\d+)$")
+    valid = parts["number"].notna()
+    parsed = df[valid].assign(desk=parts.loc[valid, "desk"].astype("category"),
+                              number=parts.loc[valid, "number"].astype("int64"))
+    return parsed.sort_values(["desk", "number"], kind="stable"), df[~valid]
+
+
+def find_gaps(parsed):
+    """
+    A function which finds the missing receipt numbers of every desk.
+    Each desk is expected to number its receipts from 1 without gaps.
+
+    Parameters
+    ----------
+    parsed: pandas.core.frame.DataFrame
+        Output of `parse_receipts`.
+
+    Returns
+    -------
+    pandas.core.frame.DataFrame
+        Columns `desk`, `from`, `to` and `missing` per gap.
+    """
+
+    numbers = parsed[["desk", "number"]].drop_duplicates()
+    previous = numbers.groupby("desk", observed=True)["number"].shift(fill_value=0)
+    gaps = numbers[numbers["number"] - previous > 1].assign(start=previous + 1)
+
+    return pd.DataFrame({
+        "desk": gaps["desk"],
+        "from": gaps["start"],
+        "to": gaps["number"] - 1,
+        "missing": gaps["number"] - gaps["start"]
+    }).reset_index(drop=True)
+
+
+def find_duplicates(parsed):
+    """
+    A function which finds receipt numbers used more than once.
+
+    Parameters
+    ----------
+    parsed: pandas.core.frame.DataFrame
+        Output of `parse_receipts`.
+
+    Returns
+    -------
+    pandas.core.frame.DataFrame
+        Every participation whose receipt number is repeated.
+    """
+
+    return parsed[parsed.duplicated(["desk", "number"], keep=False)].reset_index(drop=True)
+
+
+def find_fee_mismatches(df, paid_column=None):
+    """
+    A function which finds participations of unknown events and, if a
+    paid amount column is given, amounts differing from the event fees.
+
+    Parameters
+    ----------
+    df: pandas.core.frame.DataFrame
+        Participations with `fees` from the events table.
+
+    paid_column: str
+        Column of the amount paid, or None.
+
+    Returns
+    -------
+    pandas.core.frame.DataFrame
+        Mismatched participations with a `problem` column.
+    """
+
+    unknown = df["fees"].isna()
+    problems = pd.Series(pd.NA, index=df.index, dtype="string").mask(unknown, "unknown event")
+
+    if paid_column is not None:
+        paid = pd.to_numeric(df[paid_column], errors="coerce")
+        wrong = ~unknown & (paid != pd.to_numeric(df["fees"], errors="coerce")).fillna(True)
+        problems = problems.mask(wrong, "paid differs from fees")
+
+    return df.assign(problem=problems).dropna(subset=["problem"]).reset_index(drop=True)
+
+
+def audit(df, paid_column=None):
+    """
+    A function which runs every check of the receipt audit.
+
+    Parameters
+    ----------
+    df: pandas.core.frame.DataFrame
+        Participations with `receipt_no` and `fees` columns.
+
+    paid_column: str
+        Column of the amount paid, or None.
+
+    Returns
+    -------
+    dict:
+        Check name -> pandas.core.frame.DataFrame of findings.
+    """
+
+    parsed, malformed = parse_receipts(df)
+    return {
+        "gaps": find_gaps(parsed),
+        "duplicates": find_duplicates(parsed),
+        "malformed": malformed.reset_index(drop=True),
+        "fee mismatches": find_fee_mismatches(df, paid_column)
+    }
+
+
+def main():
+    try:
+        logging.basicConfig(filename="logs.log", filemode="a", level=logging.DEBUG,
+                            format="\n%(asctime)s  %(levelname)s: %(message)s")
+        instrument.start("receipt_audit")
+        config = get_config(os.path.join(os.path.abspath("."), "config.json"))
+        paid_column = config.get("paid_column")
+
+        connection = pymysql.connect(host=config["mysql_host"], user=config["mysql_user"],
+                                     passwd=config["mysql_pass"], db=config["mysql_db"])
+        df = instrument.read_sql(QUERY.format(paid=", p.{}".format(paid_column) if paid_column else ""),
+                                 connection)
+        connection.close()
+
+        with instrument.stage("audit", "receipts") as info:
+            findings = audit(df, paid_column)
+            info["rows"] = len(df)
+
+        for name, found in findings.items():
+            file_name = "Receipt {}.csv".format(name)
+            with instrument.stage("write", file_name) as info:
+                found.to_csv(file_name, index=False)
+                info.update(instrument.written(file_name, len(found)))
+            print("{}: {}".format(name.capitalize(), len(found)))
+
+        if not findings["gaps"].empty:
+            print(findings["gaps"].groupby("desk", observed=True)["missing"].sum().to_string())
+
+    except FileNotFoundError as file_err:
+        logging.exception(str(file_err))
+    except json.decoder.JSONDecodeError as json_err:
+        logging.exception(str(json_err))
+    except KeyError as key_err:
+        logging.exception(str(key_err))
+    except pymysql.err.Error as pymysql_err:
+        logging.exception(pymysql_err)
+    except Exception as ex:
+        logging.exception(str(ex))
+
+
+if __name__ == '__main__':
+    profiling.run(main, 'receipt_audit')
@@ -0,0 +1,72 @@
+"""Normalization and deduplication of mobile numbers before sending SMS"""
+
+import logging
+
+import pandas as pd
+
+COUNTRY_CODE = "91"
+
+
+def normalize_mobiles(mobiles):
+    """
+    A function which normalizes mobile numbers to E.164 format in a
+    vectorized way. Numbers may be ints, floats such as 9876543210.0,
+    strings with spaces or dashes, or carry a 0, 91 or +91 prefix.
+
+    Parameters
+    ----------
+    mobiles: pandas.core.series.Series
+        Mobile numbers as stored in the database.
+
+    Returns
+    -------
+    pandas.core.series.Series
+        Numbers like `+919876543210`, or NA where the number is invalid.
+    """
+
+    numbers = pd.to_numeric(mobiles, errors="coerce")
+    # Whole numbers only, so 9876543210.0 becomes "9876543210"
+    digits = numbers.where(numbers.notna() & (numbers % 1 == 0)).astype("Int64").astype("string")
+    # Numbers which did not parse as numeric may still be strings like "+91 98765-43210"
+    text = mobiles.astype("string").str.replace(r"\D", "", regex=True)
+    digits = digits.fillna(text)
+
+    national = digits.str.replace(r"^(?:{}|0)(?=\d{{10}}$)".format(COUNTRY_CODE), "", regex=True)
+    valid = national.str.fullmatch(r"[6-9]\d{9}").fillna(False).astype(bool)
+
+    return ("+" + COUNTRY_CODE + national).where(valid)
+
+
+def prepare_recipients(participants, column="mobile"):
+    """
+    A function which normalizes the mobile numbers of participants,
+    drops invalid numbers and keeps one row per number.
+
+    Parameters
+    ----------
+    participants: pandas.core.frame.DataFrame
+        Participants with a mobile number column.
+
+    column: str
+        Name of the mobile number column.
+
+    Returns
+    -------
+    tuple:
+        The deduplicated participants with an added `e164` column and a
+        dict of `total`, `invalid`, `duplicates` and `recipients` counts.
+    """
+
+    participants = participants.assign(e164=normalize_mobiles(participants[column]))
+    valid = participants.dropna(subset=["e164"])
+    recipients = valid.drop_duplicates(subset=["e164"])
+
+    counts = {
+        "total": len(participants),
+        "invalid": len(participants) - len(valid),
+        "duplicates": len(valid) - len(recipients),
+        "recipients": len(recipients)
+    }
+    logging.info("Recipients {}".format(counts))
+
+    return recipients, counts
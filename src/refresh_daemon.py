@@ -0,0 +1,192 @@
+"""A python script to rerun reports on a schedule when the data has changed
+
+Usage: python src/refresh_daemon.py [interval seconds] [--once]
+
+Every interval the daemon reads a cheap change signal, the maximum id and row
+count of `participations` and the checksum of `events`, over one warm
+connection. Only the jobs depending on a changed table are rerun, and the
+timing of every run is appended to `refresh_history.jsonl`. The signal of a
+table is only taken as seen once every job depending on it succeeded, so a
+failed job is retried on the next interval.
+
+The lookup job updates `lookup.db` in place. `lookup.py serve` opens the
+index on every request, so it can run next to the daemon and always
+answers from the latest refresh. With a gdbm index a refresh fails while a
+request holds the file and is retried on the next interval.
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+import datetime
+
+import pymysql
+
+import lookup
+import summaries
+import instrument
+import report_bundle
+
+HISTORY_FILE = "refresh_history.jsonl"
+
+# Job name -> (tables it depends on, function taking the connection)
+JOBS = {
+    "summaries": (("participations",), summaries.refresh),
+    "lookup": (("participations",), lookup.refresh),
+    "bundle": (("participations", "events"), report_bundle.run),
+}
+
+
+def get_config(file_name):
+    """
+    A function which takes the path of the configuration
+    file and returns a config object.
+
+    Parameters
+    ----------
+    file_name: str
+        Path of JSON configuration file.
+
+    Returns
+    -------
+    config: dict
+        Dictionary object created from JSON configuration.
+    """
+
+    with open(file_name) as config_file:
+        return json.load(config_file)
+
+
+def get_signal(connection):
+    """
+    A function which reads the change signal of the tables.
+
+    Parameters
+    ----------
+    connection: pymysql.connections.Connection
+        Database connection object.
+
+    Returns
+    -------
+    dict:
+        Table name -> list of values which change with its data.
+    """
+
+    cursor = connection.cursor()
+    cursor.execute("SELECT COALESCE(MAX(id), 0), COUNT(*) FROM participations")
+    participations = list(cursor.fetchone())
+    cursor.execute("CHECKSUM TABLE events")
+    events = [cursor.fetchone()[1]]
+    cursor.close()
+
+    return {"participations": participations, "events": events}
+
+
+def run_jobs(connection, changed):
+    """
+    A function which reruns the jobs depending on the changed tables
+    and appends their timing to the history file.
+
+    Parameters
+    ----------
+    connection: pymysql.connections.Connection
+        Database connection object.
+
+    changed: set
+        Names of the changed tables.
+
+    Returns
+    -------
+    list:
+        History entries of the jobs which were run.
+    """
+
+    entries = []
+    for name, (tables, job) in JOBS.items():
+        if not changed.intersection(tables):
+            continue
+
+        start = time.perf_counter()
+        status = "ok"
+        try:
+            job(connection)
+        except Exception as ex:
+            status = "{}: {}".format(type(ex).__name__, ex)
+            logging.exception(str(ex))
+        seconds = time.perf_counter() - start
+
+        entry = {
+            "time": datetime.datetime.now().isoformat(timespec="seconds"),
+            "job": name,
+            "seconds": round(seconds, 4),
+            "status": status,
+            "changed": sorted(changed)
+        }
+        entries.append(entry)
+        logging.info("Refresh job {job} took {seconds}s ({status})".format(**entry))
+
+    with open(HISTORY_FILE, "a") as history:
+        for entry in entries:
+            history.write(json.dumps(entry) + "\n")
+
+    return entries
+
+
+def main():
+    try:
+        logging.basicConfig(filename="logs.log", filemode="a", level=logging.DEBUG,
+                            format="\n%(asctime)s  %(levelname)s: %(message)s")
+        instrument.start("refresh_daemon")
+        config = get_config(os.path.join(os.path.abspath("."), "config.json"))
+
+        args = [arg for arg in sys.argv[1:] if arg != "--once"]
+        interval = float(args[0]) if args else 300.0
+        once = "--once" in sys.argv[1:]
+
+        connection = pymysql.connect(host=config["mysql_host"], user=config["mysql_user"],
+                                     passwd=config["mysql_pass"], db=config["mysql_db"], autocommit=True)
+        last_signal = {}
+
+        while True:
+            connection.ping(reconnect=True)
+            signal = get_signal(connection)
+            changed = {table for table, values in signal.items() if last_signal.get(table) != values}
+
+            failed = set()
+            if changed:
+                for entry in run_jobs(connection, changed):
+                    print("{time} {job} {seconds}s {status}".format(**entry))
+                    if entry["status"] != "ok":
+                        failed.update(JOBS[entry["job"]][0])
+            else:
+                logging.info("No changes, skipping refresh")
+
+            # Tables of failed jobs keep their old signal so the jobs are retried
+            for table, values in signal.items():
+                if table not in failed:
+                    last_signal[table] = values
+
+            if once:
+                break
+            time.sleep(interval)
+
+        connection.close()
+
+    except KeyboardInterrupt:
+        pass
+    except FileNotFoundError as file_err:
+        logging.exception(str(file_err))
+    except json.decoder.JSONDecodeError as json_err:
+        logging.exception(str(json_err))
+    except KeyError as key_err:
+        logging.exception(str(key_err))
+    except pymysql.err.Error as pymysql_err:
+        logging.exception(pymysql_err)
+    except Exception as ex:
+        logging.exception(str(ex))
+
+
+if __name__ == '__main__':
+    main()
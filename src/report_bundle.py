@@ -0,0 +1,311 @@
+"""A python script to produce every report from a single fetch of participations
+
+Usage: python src/report_bundle.py [lower id] [upper id]
+
+The joined participations and events are loaded once and the attendance
+sheets, desk collections, event wise entries, year wise participations and
+day wise entries are derived from that frame in parallel. The reports take
+the same cutoffs as the standalone scripts: the id limits select the rows
+of the desk collections and the day wise entries, `last_id` in config.json
+caps the event wise entries, and participations without a year are counted
+under year "0" in the year wise participations.
+"""
+
+import os
+import sys
+import json
+import logging
+import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+import pymysql
+import pandas as pd
+
+import loader
+import profiling
+import instrument
+
+QUERY = "SELECT " \
+        "p.id, p.receipt_no, p.event, p.name_1, p.name_2, p.name_3, p.name_4, p.name_5, p.name_6, " \
+        "p.mobile, p.year, e.type, e.department, e.fees " \
+        "FROM " \
+        "participations p " \
+        "JOIN " \
+        "events e " \
+        "ON p.event = e.name"
+
+NAME_COLUMNS = ["name_1", "name_2", "name_3", "name_4", "name_5", "name_6"]
+
+
+def get_config(file_name):
+    """
+    A function which takes the path of the configuration
+    file and returns a config object.
+
+    Parameters
+    ----------
+    file_name: str
+        Path of JSON configuration file.
+
+    Returns
+    -------
+    config: dict
+        Dictionary object created from JSON configuration.
+    """
+
+    with open(file_name) as config_file:
+        return json.load(config_file)
+
+
+def save_csv(df, file_name, **kwargs):
+    """
+    A function which writes a DataFrame to a CSV file and records it.
+
+    Parameters
+    ----------
+    df: pandas.core.frame.DataFrame
+        The DataFrame to write.
+
+    file_name: str
+        Path of the target CSV file.
+    """
+
+    with instrument.stage("write", file_name) as info:
+        df.to_csv(file_name, **kwargs)
+        info.update(instrument.written(file_name, len(df)))
+
+
+def attendance_sheets(df, output_dir):
+    """
+    A function which writes one attendance workbook per event
+    except adventure events.
+
+    Parameters
+    ----------
+    df: pandas.core.frame.DataFrame
+        Joined participations and events.
+
+    output_dir: str
+        Directory of the reports.
+    """
+
+    df = df[df["type"] != "adventure"]
+    names = df[NAME_COLUMNS].fillna("")
+    combined = names["name_1"]
+    for column in NAME_COLUMNS[1:]:
+        combined = combined + "\n" + names[column]
+    sheets = pd.DataFrame({
+        "event": df["event"],
+        "receipt_no": df["receipt_no"],
+        "name": combined.str.strip(),
+        "mobile": df["mobile"]
+    })
+
+    for event, participants in sheets.groupby("event", observed=True):
+        participants = participants[["receipt_no", "name", "mobile"]]
+        participants.index = range(1, len(participants) + 1)
+        file_name = os.path.join(output_dir, "{}.xlsx".format(event))
+        with instrument.stage("write", file_name) as info:
+            participants.to_excel(file_name, sheet_name=event, index_label="Sr. No.")
+            info.update(instrument.written(file_name, len(participants)))
+
+
+def select_ids(df, lower_limit, upper_limit):
+    """
+    A function which selects the participations within an id range.
+
+    Parameters
+    ----------
+    df: pandas.core.frame.DataFrame
+        Joined participations and events.
+
+    lower_limit: int
+        Starting id number.
+
+    upper_limit: int
+        Last id number, or None for no limit.
+
+    Returns
+    -------
+    pandas.core.series.Series
+        Boolean mask of the selected rows.
+    """
+
+    selected = df["id"] >= lower_limit
+    if upper_limit is not None:
+        selected &= df["id"] <= upper_limit
+    return selected.fillna(False).astype(bool)
+
+
+def desk_collections(df, output_dir, lower_limit=0, upper_limit=None):
+    """
+    A function which writes the total fees collected by each desk
+    for the participations within an id range.
+
+    Parameters
+    ----------
+    df: pandas.core.frame.DataFrame
+        Joined participations and events.
+
+    output_dir: str
+        Directory of the reports.
+
+    lower_limit: int
+        Starting id number.
+
+    upper_limit: int
+        Last id number, or None for no limit.
+    """
+
+    df = df[select_ids(df, lower_limit, upper_limit)]
+    desk = df["receipt_no"].str.rsplit("/", n=1).str[0].rename("desk")
+    save_csv(df["fees"].groupby(desk).sum(), os.path.join(output_dir, "Desk collections.csv"))
+
+
+def event_wise_entries(df, output_dir, last_id=None):
+    """
+    A function which writes the number of entries of each event.
+
+    Parameters
+    ----------
+    df: pandas.core.frame.DataFrame
+        Joined participations and events.
+
+    output_dir: str
+        Directory of the reports.
+
+    last_id: int
+        Last participation id counted, or None for no cutoff.
+    """
+
+    if last_id is not None:
+        df = df[select_ids(df, 0, last_id)]
+    entries = df["event"].value_counts().rename_axis("Event Name").reset_index(name="No. of entries")
+    save_csv(entries, os.path.join(output_dir, "Event wise entries.csv"), index=False)
+
+
+def year_wise_participations(df, output_dir):
+    """
+    A function which writes the number of participants from each
+    academic year for every event.
+
+    Parameters
+    ----------
+    df: pandas.core.frame.DataFrame
+        Joined participations and events.
+
+    output_dir: str
+        Directory of the reports.
+    """
+
+    # The year wise script counts participations without a year as "0"
+    years = pd.crosstab([df["type"], df["department"], df["event"]],
+                        df["year"].astype("string").fillna("0").rename("year"))
+    save_csv(years, os.path.join(output_dir, "Year wise participations.csv"))
+
+
+def daywise_entries(df, output_dir, lower_limit, upper_limit):
+    """
+    A function which writes the total entries of every event and the
+    entries of non adventure events within an id range.
+
+    Parameters
+    ----------
+    df: pandas.core.frame.DataFrame
+        Joined participations and events.
+
+    output_dir: str
+        Directory of the reports.
+
+    lower_limit: int
+        Starting id number.
+
+    upper_limit: int
+        Last id number, or None for no limit.
+    """
+
+    total = df["event"].value_counts().rename_axis("Event name").reset_index(name="No. of entries")
+    save_csv(total, os.path.join(output_dir, "total.csv"))
+
+    day = df[select_ids(df, lower_limit, upper_limit) & (df["type"] != "adventure")]
+    columns = ["receipt_no"] + NAME_COLUMNS + ["event", "year", "mobile"]
+    save_csv(day[columns], os.path.join(output_dir, "Entries on {}.csv".format(datetime.date.today())))
+
+
+def run(connection, lower_limit=0, upper_limit=None, last_id=None):
+    """
+    A function which loads the joined data once and renders every
+    report from it in parallel.
+
+    Parameters
+    ----------
+    connection: pymysql.connections.Connection
+        Database connection object.
+
+    lower_limit: int
+        Starting id number of the desk collections and day wise entries.
+
+    upper_limit: int
+        Last id number of the desk collections and day wise entries, or None
+        for no limit.
+
+    last_id: int
+        Last participation id of the event wise entries, or None for
+        no cutoff.
+
+    Returns
+    -------
+    str:
+        Directory of the reports.
+    """
+
+    df = loader.read_typed(QUERY, connection)
+
+    output_dir = "Reports {}".format(datetime.date.today())
+    os.makedirs(output_dir, exist_ok=True)
+
+    with ThreadPoolExecutor() as executor:
+        futures = [
+            executor.submit(attendance_sheets, df, output_dir),
+            executor.submit(desk_collections, df, output_dir, lower_limit, upper_limit),
+            executor.submit(event_wise_entries, df, output_dir, last_id),
+            executor.submit(year_wise_participations, df, output_dir),
+            executor.submit(daywise_entries, df, output_dir, lower_limit, upper_limit),
+        ]
+        for future in futures:
+            future.result()
+
+    return output_dir
+
+
+def main():
+    try:
+        logging.basicConfig(filename="logs.log", filemode="a", level=logging.DEBUG,
+                            format="\n%(asctime)s  %(levelname)s: %(message)s")
+        instrument.start("report_bundle")
+        config = get_config(os.path.join(os.path.abspath("."), "config.json"))
+
+        lower_limit = int(sys.argv[1]) if len(sys.argv) > 1 else 0
+        upper_limit = int(sys.argv[2]) if len(sys.argv) > 2 else None
+
+        connection = pymysql.connect(host=config["mysql_host"], user=config["mysql_user"],
+                                     passwd=config["mysql_pass"], db=config["mysql_db"])
+        run(connection, lower_limit, upper_limit, config.get("last_id"))
+        connection.close()
+
+        print("Done")
+
+    except FileNotFoundError as file_err:
+        logging.exception(str(file_err))
+    except json.decoder.JSONDecodeError as json_err:
+        logging.exception(str(json_err))
+    except KeyError as key_err:
+        logging.exception(str(key_err))
+    except pymysql.err.Error as pymysql_err:
+        logging.exception(pymysql_err)
+    except Exception as ex:
+        logging.exception(str(ex))
+
+
+if __name__ == '__main__':
+    profiling.run(main, 'report_bundle')
@@ -0,0 +1,267 @@
+"""A python script to incrementally refresh the summary tables of participations
+
+Usage: python src/summaries.py [--rebuild]
+
+The summary tables hold the entries per event, the entries and fees per desk
+and the entries per event and academic year. Each refresh folds in only the
+participations above the last settled id, so reading the reports from them
+costs O(#events) instead of O(#participations).
+
+The newest `TRAILING_IDS` participations are not settled. Their counts are
+kept in the `_tail` tables and re-scanned on every refresh, so rows committed
+late with a lower id and recent updates or deletes are reconciled. Changes
+to older rows need `--rebuild`, which recomputes the tables from scratch.
+"""
+
+import os
+import sys
+import json
+import logging
+
+import pymysql
+
+import profiling
+import instrument
+
+TABLES = [
+    "CREATE TABLE IF NOT EXISTS summary_state ("
+    "name VARCHAR(50) PRIMARY KEY, "
+    "last_id INT NOT NULL)",
+
+    "CREATE TABLE IF NOT EXISTS summary_events ("
+    "event VARCHAR(100) PRIMARY KEY, "
+    "entries INT NOT NULL)",
+
+    "CREATE TABLE IF NOT EXISTS summary_desks ("
+    "desk VARCHAR(20) PRIMARY KEY, "
+    "entries INT NOT NULL, "
+    "fees INT NOT NULL)",
+
+    "CREATE TABLE IF NOT EXISTS summary_event_years ("
+    "event VARCHAR(100) NOT NULL, "
+    "year VARCHAR(10) NOT NULL, "
+    "entries INT NOT NULL, "
+    "PRIMARY KEY (event, year))",
+
+    "CREATE TABLE IF NOT EXISTS summary_events_tail LIKE summary_events",
+    "CREATE TABLE IF NOT EXISTS summary_desks_tail LIKE summary_desks",
+    "CREATE TABLE IF NOT EXISTS summary_event_years_tail LIKE summary_event_years",
+]
+
+# Number of the newest participations re-scanned on every refresh
+TRAILING_IDS = 1000
+
+# Desk is the part of the receipt number before the last "/"
+DESK = "LEFT(p.receipt_no, LENGTH(p.receipt_no) - LENGTH(SUBSTRING_INDEX(p.receipt_no, '/', -1)) - 1)"
+
+# Folds of the participations in (last_id, max_id] into the summary
+# tables, or into their `_tail` tables with suffix "_tail"
+FOLDS = [
+    "INSERT INTO summary_events{suffix} (event, entries) "
+    "SELECT p.event, COUNT(*) FROM participations p "
+    "WHERE p.id > {last_id} AND p.id <= {max_id} GROUP BY p.event "
+    "ON DUPLICATE KEY UPDATE entries = entries + VALUES(entries)",
+
+    "INSERT INTO summary_desks{suffix} (desk, entries, fees) "
+    "SELECT " + DESK + ", COUNT(*), COALESCE(SUM(e.fees), 0) "
+    "FROM participations p JOIN events e ON p.event = e.name "
+    "WHERE p.id > {last_id} AND p.id <= {max_id} GROUP BY 1 "
+    "ON DUPLICATE KEY UPDATE entries = entries + VALUES(entries), fees = fees + VALUES(fees)",
+
+    "INSERT INTO summary_event_years{suffix} (event, year, entries) "
+    "SELECT p.event, COALESCE(p.year, '0'), COUNT(*) FROM participations p "
+    "WHERE p.id > {last_id} AND p.id <= {max_id} GROUP BY 1, 2 "
+    "ON DUPLICATE KEY UPDATE entries = entries + VALUES(entries)",
+]
+
+# Take the tail counts of the previous refresh out of the summary tables
+UNFOLDS = [
+    "UPDATE summary_events s JOIN summary_events_tail t ON s.event = t.event "
+    "SET s.entries = s.entries - t.entries",
+
+    "UPDATE summary_desks s JOIN summary_desks_tail t ON s.desk = t.desk "
+    "SET s.entries = s.entries - t.entries, s.fees = s.fees - t.fees",
+
+    "UPDATE summary_event_years s JOIN summary_event_years_tail t ON s.event = t.event AND s.year = t.year "
+    "SET s.entries = s.entries - t.entries",
+]
+
+# Add the freshly scanned tail counts to the summary tables
+REFOLDS = [
+    "INSERT INTO summary_events (event, entries) SELECT event, entries FROM summary_events_tail "
+    "ON DUPLICATE KEY UPDATE entries = entries + VALUES(entries)",
+
+    "INSERT INTO summary_desks (desk, entries, fees) SELECT desk, entries, fees FROM summary_desks_tail "
+    "ON DUPLICATE KEY UPDATE entries = entries + VALUES(entries), fees = fees + VALUES(fees)",
+
+    "INSERT INTO summary_event_years (event, year, entries) "
+    "SELECT event, year, entries FROM summary_event_years_tail "
+    "ON DUPLICATE KEY UPDATE entries = entries + VALUES(entries)",
+]
+
+# Drop the rows whose participations were all deleted from the tail
+PRUNES = [
+    "DELETE FROM summary_events WHERE entries = 0",
+    "DELETE FROM summary_desks WHERE entries = 0",
+    "DELETE FROM summary_event_years WHERE entries = 0",
+]
+
+SUMMARY_TABLES = ["summary_events", "summary_desks", "summary_event_years"]
+
+# summary_state rows of the last settled id and of the maximum id folded in
+SETTLED_STATE = "participations"
+REFRESHED_STATE = "participations_refreshed"
+
+# Queries used by the reports when reading from the summary tables
+EVENTS_QUERY = "SELECT event, entries FROM summary_events ORDER BY entries DESC"
+DESKS_QUERY = "SELECT desk, fees FROM summary_desks ORDER BY desk"
+EVENT_YEARS_QUERY = "SELECT year, entries AS count FROM summary_event_years WHERE event = '{}'"
+
+
+def get_config(file_name):
+    """
+    A function which takes the path of the configuration
+    file and returns a config object.
+
+    Parameters
+    ----------
+    file_name: str
+        Path of JSON configuration file.
+
+    Returns
+    -------
+    config: dict
+        Dictionary object created from JSON configuration.
+    """
+
+    with open(file_name) as config_file:
+        return json.load(config_file)
+
+
+def refresh(connection, rebuild=False):
+    """
+    A function which folds the participations added since the last
+    refresh into the summary tables in a single transaction and
+    re-scans the newest `TRAILING_IDS` of them.
+
+    Parameters
+    ----------
+    connection: pymysql.connections.Connection
+        Database connection object.
+
+    rebuild: bool
+        Empty the summary tables and recompute them from scratch.
+
+    Returns
+    -------
+    tuple:
+        The previous and the new last settled id, and the maximum id.
+    """
+
+    cursor = connection.cursor()
+    for table in TABLES:
+        cursor.execute(table)
+
+    try:
+        connection.begin()
+        cursor.execute("SELECT last_id FROM summary_state WHERE name = %s FOR UPDATE", (SETTLED_STATE,))
+        row = cursor.fetchone()
+        last_id = row[0] if row and not rebuild else 0
+
+        if rebuild:
+            # DELETE rather than TRUNCATE, which would commit the transaction
+            for table in SUMMARY_TABLES:
+                instrument.execute(cursor, "DELETE FROM {}".format(table))
+                instrument.execute(cursor, "DELETE FROM {}_tail".format(table))
+        else:
+            for unfold in UNFOLDS:
+                instrument.execute(cursor, unfold)
+            for table in SUMMARY_TABLES:
+                instrument.execute(cursor, "DELETE FROM {}_tail".format(table))
+
+        cursor.execute("SELECT COALESCE(MAX(id), 0) FROM participations")
+        max_id = cursor.fetchone()[0]
+        safe_id = max(last_id, max_id - TRAILING_IDS)
+
+        for fold in FOLDS:
+            if safe_id > last_id:
+                instrument.execute(cursor, fold.format(suffix="", last_id=last_id, max_id=safe_id))
+            instrument.execute(cursor, fold.format(suffix="_tail", last_id=safe_id, max_id=max_id))
+        for refold in REFOLDS:
+            instrument.execute(cursor, refold)
+        for prune in PRUNES:
+            instrument.execute(cursor, prune)
+
+        cursor.executemany("INSERT INTO summary_state (name, last_id) VALUES (%s, %s) "
+                           "ON DUPLICATE KEY UPDATE last_id = VALUES(last_id)",
+                           [(SETTLED_STATE, safe_id), (REFRESHED_STATE, max_id)])
+        connection.commit()
+
+    except pymysql.err.Error:
+        connection.rollback()
+        raise
+    finally:
+        cursor.close()
+
+    logging.info("Summary tables settled from id {} to {}, re-scanned up to {}".format(last_id, safe_id, max_id))
+    return last_id, safe_id, max_id
+
+
+def refreshed_id(connection):
+    """
+    A function which returns the maximum participation id folded into
+    the summary tables by the last refresh.
+
+    Parameters
+    ----------
+    connection: pymysql.connections.Connection
+        Database connection object.
+
+    Returns
+    -------
+    int:
+        The id, or None if the tables were never refreshed.
+    """
+
+    cursor = connection.cursor()
+    try:
+        cursor.execute("SELECT last_id FROM summary_state WHERE name = %s", (REFRESHED_STATE,))
+        row = cursor.fetchone()
+    except pymysql.err.ProgrammingError:
+        # summary_state does not exist yet
+        row = None
+    finally:
+        cursor.close()
+    return row[0] if row else None
+
+
+def main():
+    try:
+        logging.basicConfig(filename="logs.log", filemode="a", level=logging.DEBUG,
+                            format="\n%(asctime)s  %(levelname)s: %(message)s")
+        instrument.start("summaries")
+        rebuild = "--rebuild" in sys.argv[1:]
+        config = get_config(os.path.join(os.path.abspath("."), "config.json"))
+
+        connection = pymysql.connect(host=config["mysql_host"], user=config["mysql_user"],
+                                     passwd=config["mysql_pass"], db=config["mysql_db"])
+        last_id, safe_id, max_id = refresh(connection, rebuild)
+        connection.close()
+
+        print("{} participations up to {}, re-scanned {} to {}".format(
+            "Rebuilt" if rebuild else "Settled", safe_id, safe_id + 1, max_id))
+
+    except FileNotFoundError as file_err:
+        logging.exception(str(file_err))
+    except json.decoder.JSONDecodeError as json_err:
+        logging.exception(str(json_err))
+    except KeyError as key_err:
+        logging.exception(str(key_err))
+    except pymysql.err.Error as pymysql_err:
+        logging.exception(pymysql_err)
+    except Exception as ex:
+        logging.exception(str(ex))
+
+
+if __name__ == '__main__':
+    profiling.run(main, 'summaries')
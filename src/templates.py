@@ -0,0 +1,155 @@
+"""Message templates which are validated once and rendered many times"""
+
+import time
+import string
+from functools import lru_cache
+
+# GSM 03.38 basic character set, and the extension characters which take two septets
+GSM_BASIC = set("@£$¥èéùìòÇ\nØø\rÅåΔ_ΦΓΛΩΠΨΣΘΞÆæßÉ !\"#¤%&'()*+,-./0123456789:;<=>?"
+                "¡ABCDEFGHIJKLMNOPQRSTUVWXYZÄÖÑÜ§¿abcdefghijklmnopqrstuvwxyzäöñüà")
+GSM_EXTENDED = set("^{}\\[~]|€\f")
+
+
+class Template:
+    """
+    A message template parsed once from a `str.format` style text.
+
+    The constant segments are kept once and only the fields are
+    filled in on each render. Renders of the same values are cached.
+
+    Parameters
+    ----------
+    text: str
+        The template text, e.g. `"Your password is {password}"`.
+
+    fields: iterable
+        Names of the fields the template may use.
+
+    Raises
+    ------
+    ValueError:
+        When the template cannot be parsed, uses positional fields,
+        fields outside `fields`, or a conversion or format spec which
+        fails on a sample value.
+    """
+
+    def __init__(self, text, fields):
+        self.text = text
+        # Literal text before each field and after the last one, so
+        # segments and fields alternate and len(segments) == len(fields) + 1
+        self.segments = [""]
+        self.fields = []
+
+        try:
+            parsed = list(string.Formatter().parse(text))
+        except ValueError as err:
+            raise ValueError("Invalid template {!r}: {}".format(text, err))
+
+        for literal, field, spec, conversion in parsed:
+            # Escaped braces split the literal text into several parts
+            self.segments[-1] += literal
+            if field is None:
+                continue
+            if field == "" or field.isdigit():
+                raise ValueError("Template {!r} uses a positional field".format(text))
+            if field not in fields:
+                raise ValueError("Template {!r} uses unknown field {{{}}}, expected one of {}".format(
+                    text, field, sorted(fields)))
+            self.fields.append((field, "{" + ("!" + conversion if conversion else "")
+                                + (":" + spec if spec else "") + "}"))
+            self.segments.append("")
+
+        # Check conversions and format specs once with sample values
+        try:
+            self.render(**{name: "x" for name in fields})
+        except (ValueError, TypeError, KeyError, IndexError) as err:
+            raise ValueError("Invalid template {!r}: {}".format(text, err))
+
+        self.render = lru_cache(maxsize=4096)(self.render)
+
+    def render(self, **values):
+        """
+        A method which fills the template with the given values.
+
+        Returns
+        -------
+        str:
+            The rendered message.
+        """
+
+        parts = []
+        for literal, (name, field_format) in zip(self.segments, self.fields):
+            parts.append(literal)
+            parts.append(values[name] if field_format == "{}" else field_format.format(values[name]))
+        parts.append(self.segments[-1])
+        return "".join(str(part) for part in parts)
+
+
+def sms_segments(message):
+    """
+    A function which counts the SMS segments needed for a message.
+    GSM-7 messages fit 160 characters, or 153 per segment when split.
+    Messages with other characters are sent as UCS-2 with 70, or 67.
+
+    Parameters
+    ----------
+    message: str
+        The SMS text.
+
+    Returns
+    -------
+    int:
+        Number of segments.
+    """
+
+    if all(char in GSM_BASIC or char in GSM_EXTENDED for char in message):
+        length = len(message) + sum(char in GSM_EXTENDED for char in message)
+        single, multi = 160, 153
+    else:
+        length = len(message.encode("utf-16-le")) // 2
+        single, multi = 70, 67
+
+    if length <= single:
+        return 1
+    return -(-length // multi)
+
+
+def dry_run(template, rows, file_name):
+    """
+    A function which renders a whole campaign to a file instead of
+    sending it.
+
+    Parameters
+    ----------
+    template: Template
+        The compiled template.
+
+    rows: list
+        Tuples of recipient and dict of template values.
+
+    file_name: str
+        Path of the output file.
+
+    Returns
+    -------
+    dict:
+        Number of `messages`, `seconds` taken, `per_second` throughput,
+        total and maximum `segments`.
+    """
+
+    start = time.perf_counter()
+    messages = [(recipient, template.render(**values)) for recipient, values in rows]
+    seconds = time.perf_counter() - start
+
+    segments = [sms_segments(message) for _, message in messages]
+    with open(file_name, "w", encoding="utf-8") as output:
+        for (recipient, message), count in zip(messages, segments):
+            output.write("{}\t{}\t{}\n".format(recipient, count, message.replace("\n", "\\n")))
+
+    return {
+        "messages": len(messages),
+        "seconds": round(seconds, 6),
+        "per_second": round(len(messages) / seconds) if seconds else None,
+        "segments": sum(segments),
+        "max_segments": max(segments, default=0)
+    }
@@ -3,12 +3,14 @@
 import os
 import sys
 import json
-import zipfile
-
 import pymysql
 import logging
 import requests
-import pandas as pd
+
+import summaries
+import compression
+import profiling
+import instrument
 
 
 def get_config(file_name):
@@ -51,10 +53,10 @@ def get_data(connection, query):
         executing the query.
     """
 
-    return pd.read_sql(query, connection)
+    return instrument.read_sql(query, connection)
 
 
-def send_mail(api_url, api_user, api_key, data):
+def send_mail(api_url, api_user, api_key, data, files=None):
     """
     A to send Email with an attachment using
     Mailgun API.
@@ -73,6 +75,9 @@ def send_mail(api_url, api_user, api_key, data):
     data: dict
         The data for the API call
 
+    files: list
+        Attachments as (field name, (file name, bytes)) tuples.
+
     Returns
     -------
     requests.Response:
@@ -81,7 +86,65 @@ def send_mail(api_url, api_user, api_key, data):
 
     authorization = (api_user, api_key)
 
-    return requests.post(api_url, auth=authorization, data=data)
+    return requests.post(api_url, auth=authorization, data=data, files=files)
+
+
+def build_zip(connection, event_type, department, summary=False, method="deflate", level=9, output_dir="."):
+    """
+    A function which streams the year wise participations of every
+    event of a department into one zip archive.
+
+    Parameters
+    ----------
+    connection: pymysql.connections.Connection
+        Database connection object.
+
+    event_type: str
+        Type of the events.
+
+    department: str
+        Department of the events.
+
+    summary: bool
+        Read the counts maintained by summaries.py.
+
+    method: str
+        Zip compression method.
+
+    level: int
+        Zip compression level.
+
+    output_dir: str
+        Directory of the zip file.
+
+    Returns
+    -------
+    str:
+        Path of the zip file.
+    """
+
+    query = "SELECT name FROM events WHERE type = '{}' AND department = '{}'"
+
+    department_events = get_data(connection, query.format(event_type, department))
+
+    if summary:
+        # Read the counts maintained by summaries.py
+        query = summaries.EVENT_YEARS_QUERY
+    else:
+        query = "SELECT year, COUNT(*) AS count FROM participations WHERE event = '{}' GROUP BY year"
+
+    zip_name = os.path.join(output_dir, "{}_{}.zip".format(event_type, department))
+
+    # Stream every event's CSV straight into the archive
+    with instrument.stage("write", zip_name) as info:
+        with compression.open_zip(zip_name, method, level) as target_file:
+            for _, row in department_events.iterrows():
+                year_wise_participants = get_data(connection, query.format(row["name"]))
+                compression.csv_to_zip(target_file, year_wise_participants.fillna("0"),
+                                       "{}.csv".format(row["name"]), index=False)
+        info.update(instrument.written(zip_name, len(department_events)))
+
+    return zip_name
 
 
 def main():
@@ -89,6 +152,7 @@ def main():
         # Initialize logging module
         logging.basicConfig(filename="logs.log", filemode="a", level=logging.DEBUG,
                             format="\n%(asctime)s  %(levelname)s: %(message)s")
+        instrument.start("year_wise_participations")
         # Name of configuration file
         config_file_name = "config.json"
         # Get absolute file path of configuration file
@@ -105,34 +169,19 @@ def main():
         # Connect to MySQL database
         connection = pymysql.connect(host=host, user=user, passwd=password, db=database)
 
-        event_type = sys.argv[1]
-        department = sys.argv[2]
+        args = [arg for arg in sys.argv[1:] if arg != "--summary"]
+        event_type = args[0]
+        department = args[1]
         logging.info("Event type = {} Department = {}".format(event_type, department))
-        query = "SELECT name FROM events WHERE type = '{}' AND department = '{}'"
-        logging.info(query)
-
-        department_events = get_data(connection, query.format(event_type, department))
-
-        for _, row in department_events.iterrows():
-            logging.info(query)
-            query = "SELECT year, COUNT(*) AS count FROM participations WHERE event = '{}' GROUP BY year"
-            year_wise_participants = get_data(connection, query.format(row["name"]))
-            year_wise_participants.fillna("0").to_csv("{}.csv".format(row["name"]), index=False)
-
-        csv_files = list(filter(lambda x: ".csv" in x, os.listdir(".")))
-
-        zip_name = "{}_{}.zip".format(event_type, department)
 
-        with zipfile.ZipFile(zip_name, "w") as target_file:
-            for file in csv_files:
-                target_file.write(file)
+        zip_name = build_zip(connection, event_type, department, "--summary" in sys.argv[1:],
+                             config.get("zip_method", "deflate"), config.get("zip_level", 9))
 
         # Get Mail API Credentials
         api_url = config["mailgun_api_url"]
         api_user = config["mailgun_user"]
         api_key = config["mailgun_key"]
 
-        # TODO - Need to check whether mail sends zip file or not
         data = {
             "from": config["mailgun_sender"],
             "to": "Sender Name <sender email address>",
@@ -140,14 +189,15 @@ def main():
             "text": "Year wise participations for each {event_type} event for {dept} Department".format(
                 event_type=event_type,
                 dept=department
-            ),
-            "files": [("attachment",  open(zip_name, "rb"))]
+            )
         }
+        with open(zip_name, "rb") as zip_file:
+            files = [("attachment", (os.path.basename(zip_name), zip_file.read()))]
 
         logging.info("API call params = {}".format(data))
 
         # Send the mail
-        response = send_mail(api_url, api_user, api_key, data)
+        response = instrument.api_call("mailgun", send_mail, api_url, api_user, api_key, data, files)
 
         logging.info("API call response = {}".format(json.dumps(response.json())))
         print(response.json())
@@ -167,4 +217,4 @@ def main():
 
 
 if __name__ == '__main__':
-    main()
+    profiling.run(main, 'year_wise_participations')
@@ -0,0 +1,66 @@
+import os
+import sys
+import json
+import email
+import threading
+from urllib.parse import parse_qs
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir)
+
+# The scripts import their shared modules from src/ and utils/
+sys.path.insert(0, os.path.join(ROOT, "src"))
+sys.path.insert(0, os.path.join(ROOT, "utils"))
+
+
+def parse_form(content_type, body):
+    """Form fields of a urlencoded or multipart request as name -> list of values.
+    Uploaded files are (file name, bytes) tuples."""
+
+    if content_type.startswith("multipart/form-data"):
+        message = email.message_from_bytes(b"Content-Type: " + content_type.encode() + b"\r\n\r\n" + body)
+        fields = {}
+        for part in message.get_payload():
+            value = part.get_payload(decode=True)
+            name = part.get_param("name", header="content-disposition")
+            file_name = part.get_param("filename", header="content-disposition")
+            fields.setdefault(name, []).append((file_name, value) if file_name else value.decode("utf-8"))
+        return fields
+    return parse_qs(body.decode("utf-8"), keep_blank_values=True)
+
+
+@pytest.fixture
+def mailgun_stub():
+    """A local stand-in of the Mailgun messages API. Yields the URL and the
+    list of received requests as dicts of `path`, `auth` and `form`."""
+
+    received = []
+    lock = threading.Lock()
+
+    class MailgunHandler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers["Content-Length"]))
+            with lock:
+                received.append({
+                    "path": self.path,
+                    "auth": self.headers.get("Authorization"),
+                    "form": parse_form(self.headers["Content-Type"], body)
+                })
+                message_id = "<{}@stub>".format(len(received))
+            response = json.dumps({"id": message_id, "message": "Queued. Thank you."}).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(response)))
+            self.end_headers()
+            self.wfile.write(response)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), MailgunHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield "http://127.0.0.1:{}/v3/example.com/messages".format(server.server_address[1]), received
+    server.shutdown()
+    server.server_close()
@@ -0,0 +1,61 @@
+import json
+
+import pytest
+
+import event_mgr_sms_passwords as mgr_passwords
+
+TEXT = "Your password for {event} is {password}"
+
+
+def test_make_batches_splits_repeated_managers():
+    recipients = [
+        ("a@example.com", {"event": "Robowars", "password": "111111"}),
+        ("b@example.com", {"event": "Robowars", "password": "222222"}),
+        ("a@example.com", {"event": "Quiz", "password": "333333"}),
+    ]
+    assert mgr_passwords.make_batches(recipients) == [
+        {"a@example.com": {"event": "Robowars", "password": "111111"},
+         "b@example.com": {"event": "Robowars", "password": "222222"}},
+        {"a@example.com": {"event": "Quiz", "password": "333333"}},
+    ]
+
+
+def test_make_batches_respects_limit():
+    recipients = [("{}@example.com".format(i), {"event": "Quiz", "password": str(i)}) for i in range(5)]
+    assert [len(batch) for batch in mgr_passwords.make_batches(recipients, limit=2)] == [2, 2, 1]
+
+
+def test_send_batch_against_stub(mailgun_stub):
+    pytest.importorskip("requests")
+    url, received = mailgun_stub
+    recipients = [
+        ("a@example.com", {"event": "Robowars", "password": "111111"}),
+        ("b@example.com", {"event": "Robowars", "password": "222222"}),
+        ("a@example.com", {"event": "Quiz", "password": "333333"}),
+    ]
+
+    results = mgr_passwords.send_batch(url, "api", "key", "Udaan <noreply@example.com>", "Passwords", TEXT,
+                                       recipients)
+
+    # A manager of two events is sent two mails, in separate batches
+    assert len(received) == 2
+    first, second = (request["form"] for request in received)
+
+    assert first["to"] == ["<a@example.com>", "<b@example.com>"]
+    assert second["to"] == ["<a@example.com>"]
+    assert first["text"] == ["Your password for %recipient.event% is %recipient.password%"]
+    assert json.loads(first["recipient-variables"][0]) == {
+        "a@example.com": {"event": "Robowars", "password": "111111"},
+        "b@example.com": {"event": "Robowars", "password": "222222"},
+    }
+    assert json.loads(second["recipient-variables"][0]) == {
+        "a@example.com": {"event": "Quiz", "password": "333333"},
+    }
+    assert all(request["auth"].startswith("Basic ") for request in received)
+
+    # Every result maps back to its recipient, event and batch message id
+    assert results == [
+        ("a@example.com", "Robowars", 200, "<1@stub>"),
+        ("b@example.com", "Robowars", 200, "<1@stub>"),
+        ("a@example.com", "Quiz", 200, "<2@stub>"),
+    ]
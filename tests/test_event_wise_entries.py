@@ -0,0 +1,48 @@
+import sqlite3
+
+import pytest
+
+pytest.importorskip("pandas")
+pytest.importorskip("pymysql")
+pytest.importorskip("requests")
+
+import event_wise_entries
+
+
+@pytest.fixture
+def connection():
+    connection = sqlite3.connect(":memory:")
+    connection.execute("CREATE TABLE participations (id INTEGER PRIMARY KEY, event VARCHAR(100))")
+    connection.executemany("INSERT INTO participations (id, event) VALUES (?, ?)",
+                           [(1, "Quiz"), (2, "Robowars"), (3, "Robowars"), (4, "Quiz"), (5, "Quiz")])
+    yield connection
+    connection.close()
+
+
+def test_build_entries_without_cutoff(connection):
+    document = event_wise_entries.build_entries(connection)
+    assert document.decode("utf-8").splitlines() == ["Event Name,No. of entries", "Quiz,3", "Robowars,2"]
+
+
+def test_build_entries_with_last_id(connection):
+    document = event_wise_entries.build_entries(connection, last_id=3)
+    assert document.decode("utf-8").splitlines() == ["Event Name,No. of entries", "Robowars,2", "Quiz,1"]
+
+
+def test_send_mails_against_stub(mailgun_stub):
+    url, received = mailgun_stub
+    receivers = ["One <one@example.com>", "Two <two@example.com>", "Three <three@example.com>"]
+    attachment = b"Event Name,No. of entries\r\nQuiz,3\r\n"
+
+    responses = event_wise_entries.send_mails(
+        receivers, workers=3, api_url=url, user="api", key="key", sender="Udaan <noreply@example.com>",
+        subject="Total entries", text="Entries attached", file_name="entries.csv", attachment=attachment)
+
+    # Results come back in the order of the receivers
+    assert [receiver for receiver, _ in responses] == receivers
+    assert all(response.status_code == 200 for _, response in responses)
+
+    assert sorted(request["form"]["to"][0] for request in received) == sorted(receivers)
+    for request in received:
+        assert request["form"]["subject"] == ["Total entries"]
+        assert request["form"]["attachment"] == [("entries.csv", attachment)]
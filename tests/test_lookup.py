@@ -0,0 +1,60 @@
+import dbm
+import json
+import threading
+import urllib.error
+import urllib.request
+from http.server import HTTPServer
+
+import pytest
+
+import lookup
+
+
+@pytest.fixture
+def server(tmp_path, monkeypatch):
+    file_name = str(tmp_path / "lookup.db")
+    with dbm.open(file_name, "c"):
+        pass
+    monkeypatch.setattr(lookup.LookupHandler, "file_name", file_name)
+
+    server = HTTPServer(("127.0.0.1", 0), lookup.LookupHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield file_name, "http://127.0.0.1:{}".format(server.server_address[1])
+    server.shutdown()
+    server.server_close()
+
+
+def get(url):
+    try:
+        with urllib.request.urlopen(url) as response:
+            return response.status, json.load(response)
+    except urllib.error.HTTPError as http_err:
+        return http_err.code, json.load(http_err)
+
+
+def test_serve_sees_refreshed_index(server):
+    file_name, url = server
+    record = {"id": 1, "receipt_no": "A/1", "event": "Robowars", "names": ["Aarav"], "mobile": "+919876543210"}
+
+    assert get(url + "/receipt/A%2F1") == (404, [])
+
+    # Written by another handle while the server runs, as the refresh daemon does
+    with dbm.open(file_name, "w") as index:
+        index[lookup.receipt_key("A/1")] = json.dumps([record])
+        index[lookup.mobile_key(9876543210)] = json.dumps([record])
+
+    assert get(url + "/receipt/%20a%2F1") == (200, [record])
+    assert get(url + "/mobile/98765-43210") == (200, [record])
+
+
+@pytest.mark.parametrize("mobile, key", [
+    (9876543210, "m:+919876543210"),
+    (9876543210.0, "m:+919876543210"),
+    ("+91 98765-43210", "m:+919876543210"),
+    ("09876543210", "m:+919876543210"),
+    ("12345", None),
+    (None, None),
+    (float("nan"), None),
+])
+def test_mobile_key(mobile, key):
+    assert lookup.mobile_key(mobile) == key
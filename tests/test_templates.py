@@ -0,0 +1,86 @@
+import pytest
+
+import templates
+
+
+@pytest.mark.parametrize("text", [
+    "Your password is {password}",
+    "Use {{code}} {password} now",
+    "{{{password}}}",
+    "{{ {password} }} and {{more}}",
+    "{password!r} or {password:>8}|{password!s:^9}",
+    "{password}{password}",
+    "No fields at all {{}}",
+])
+def test_render_matches_str_format(text):
+    template = templates.Template(text, {"password"})
+    assert template.render(password="abc") == text.format(password="abc")
+
+
+def test_render_escaped_braces_before_field():
+    template = templates.Template("Use {{code}} {password} now", {"password"})
+    assert template.render(password="abc") == "Use {code} abc now"
+
+
+def test_render_several_fields_and_numbers():
+    template = templates.Template("{event}: {{{password:0>6}}}", {"event", "password"})
+    assert template.render(event="Robowars", password=42) == "Robowars: {000042}"
+
+
+def test_render_is_cached():
+    template = templates.Template("Hi {password}", {"password"})
+    template.render(password="a")
+    template.render(password="a")
+    assert template.render.cache_info().hits == 1
+
+
+@pytest.mark.parametrize("text", [
+    "Hi {0}",
+    "Hi {}",
+    "Hi {name}",
+    "Hi {password",
+    "Hi {password!x}",
+    "Hi {password:d}",
+    "Hi {password:{width}}",
+])
+def test_invalid_templates_are_rejected(text):
+    with pytest.raises(ValueError):
+        templates.Template(text, {"password"})
+
+
+@pytest.mark.parametrize("message, segments", [
+    ("", 1),
+    ("a" * 160, 1),
+    ("a" * 161, 2),
+    ("a" * 306, 2),
+    ("a" * 307, 3),
+    # Extension characters take two septets
+    ("{" * 80, 1),
+    ("{" * 81, 2),
+    ("€" + "a" * 159, 2),
+    # Other characters switch the message to UCS-2
+    ("अ" * 70, 1),
+    ("अ" * 71, 2),
+    ("अ" * 134, 2),
+    ("अ" * 135, 3),
+    # Characters outside the BMP take two UTF-16 code units
+    ("😀" * 35, 1),
+    ("😀" * 36, 2),
+])
+def test_sms_segments(message, segments):
+    assert templates.sms_segments(message) == segments
+
+
+def test_dry_run_writes_every_message(tmp_path):
+    template = templates.Template("Code {password}\nbye", {"password"})
+    file_name = tmp_path / "dry run.txt"
+    stats = templates.dry_run(template, [("9876543210", {"password": "abc"}),
+                                         ("9876543211", {"password": "def"})], str(file_name))
+
+    assert stats["messages"] == 2
+    assert stats["segments"] == 2
+    assert stats["max_segments"] == 1
+    assert file_name.read_text(encoding="utf-8").splitlines() == [
+        "9876543210\t1\tCode abc\\nbye",
+        "9876543211\t1\tCode def\\nbye",
+    ]
@@ -0,0 +1,167 @@
+"""A single command line entry point for all Udaan 17 analytics scripts
+
+Usage: python udaan.py [--timing] <command> [arguments...]
+
+Only the standard library is imported here. The heavy dependencies of a
+script (pandas, pymysql, requests) are loaded when its command runs. The
+start up of the CLI, the import of the script and its dependencies and the
+run of its main function are timed separately.
+"""
+
+import os
+import sys
+import time
+import logging
+import argparse
+
+START = time.perf_counter()
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# Command name -> (script path relative to ROOT, help text)
+COMMANDS = {
+    "attendance": ("src/attendance_sheets.py", "Generate attendance sheets for events"),
+    "daywise": ("src/daywise_participations.py", "Export day wise participations"),
+    "desks": ("src/desk_collections.py", "Find desk wise collections"),
+    "entries": ("src/event_wise_entries.py", "Mail event wise entries"),
+    "yearwise": ("src/year_wise_participations.py", "Mail year wise participations of a department"),
+    "bundle": ("src/report_bundle.py", "Produce every report from a single data fetch"),
+    "summaries": ("src/summaries.py", "Incrementally refresh the summary tables"),
+    "attendees": ("src/attendees.py", "Count unique attendees per event, department and year"),
+    "lookup": ("src/lookup.py", "Look up participations by receipt or mobile number"),
+    "checkin": ("src/checkin.py", "Run the event check-in service or its load test"),
+    "serve": ("src/analytics_server.py", "Serve cached analytics over local HTTP"),
+    "daemon": ("src/refresh_daemon.py", "Rerun reports on a schedule when the data changed"),
+    "receipts": ("src/receipt_audit.py", "Audit receipt numbers per desk for gaps and duplicates"),
+    "sms": ("utils/sms_event_info.py", "Send SMS about the info of an event"),
+    "mgr-passwords": ("utils/event_mgr_sms_passwords.py", "Email passwords to the event managers"),
+    "update-mobiles": ("utils/update_mobile_nums.py", "Update mobile numbers of participants"),
+    "index-advisor": ("utils/index_advisor.py", "EXPLAIN the project's queries and propose indexes"),
+}
+
+# Command name -> modules its script imports inside main, imported before
+# main runs so that their cost is timed as import rather than run
+DEFERRED_IMPORTS = {
+    "sms": ("pymysql", "requests", "loader", "recipients"),
+    "mgr-passwords": ("pymysql", "requests"),
+    "update-mobiles": ("pymysql", "pandas"),
+}
+
+
+def get_parser():
+    """
+    A function which builds the argument parser of the CLI.
+
+    Returns
+    -------
+    argparse.ArgumentParser:
+        Parser with one sub command per script.
+    """
+
+    parser = argparse.ArgumentParser(prog="udaan", description="Udaan 17 analytics")
+    parser.add_argument("--timing", action="store_true",
+                        help="Print start up and run time of the command")
+    sub_parsers = parser.add_subparsers(dest="command", metavar="command")
+    sub_parsers.required = True
+
+    for name, (_, help_text) in COMMANDS.items():
+        sub_parsers.add_parser(name, help=help_text, add_help=False)
+
+    return parser
+
+
+def load_script(path, args):
+    """
+    A function which loads a script as a module with the given command
+    line arguments, without running its `__main__` block. The script's
+    imports happen here. Scripts without a `main` function, such as the
+    day wise export, do all of their work while loading.
+
+    Parameters
+    ----------
+    path: str
+        Path of the script relative to the repository root.
+
+    args: list
+        Command line arguments for the script.
+
+    Returns
+    -------
+    dict:
+        Globals of the loaded script.
+    """
+
+    import runpy
+
+    script = os.path.join(ROOT, path)
+    script_dir = os.path.dirname(script)
+
+    sys.argv = [script] + list(args)
+    if script_dir not in sys.path:
+        sys.path.insert(0, script_dir)
+
+    return runpy.run_path(script, run_name="udaan_script")
+
+
+def run_script(path, namespace):
+    """
+    A function which runs the main function of a loaded script the way
+    its `__main__` block does, through `profiling.run` if it uses it.
+
+    Parameters
+    ----------
+    path: str
+        Path of the script relative to the repository root.
+
+    namespace: dict
+        Globals of the script returned by `load_script`.
+    """
+
+    if "profiling" in namespace:
+        name = os.path.splitext(os.path.basename(path))[0]
+        namespace["profiling"].run(namespace["main"], name)
+    else:
+        namespace["main"]()
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else list(argv)
+    # Everything after the command belongs to the script, including `-h`
+    position = next((i for i, arg in enumerate(argv) if arg in COMMANDS), len(argv))
+    args = get_parser().parse_args(argv[:position + 1])
+    script_args = argv[position + 1:]
+    path, _ = COMMANDS[args.command]
+
+    logging.basicConfig(filename="logs.log", filemode="a", level=logging.DEBUG,
+                        format="\n%(asctime)s  %(levelname)s: %(message)s")
+
+    import importlib
+
+    load_start = time.perf_counter()
+    startup = load_start - START
+    namespace = load_script(path, script_args)
+
+    if "main" in namespace:
+        for module in DEFERRED_IMPORTS.get(args.command, ()):
+            importlib.import_module(module)
+        run_start = time.perf_counter()
+        import_time = run_start - load_start
+        run_script(path, namespace)
+        run_time = time.perf_counter() - run_start
+    else:
+        # The script did its work while loading, so its imports are part of the run
+        import_time = None
+        run_time = time.perf_counter() - load_start
+
+    logging.info("udaan {} start up took {:.3f}s".format(args.command, startup))
+    if import_time is not None:
+        logging.info("udaan {} imports took {:.3f}s".format(args.command, import_time))
+    logging.info("udaan {} ran in {:.3f}s".format(args.command, run_time))
+
+    if args.timing:
+        print("Start up: {:.3f}s, import: {}, run: {:.3f}s".format(
+            startup, "n/a" if import_time is None else "{:.3f}s".format(import_time), run_time), file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
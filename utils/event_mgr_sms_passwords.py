@@ -1,15 +1,22 @@
 """A python script to email Messenger API passwords to the event managers"""
 
 import os
+import sys
 import json
 import hmac
 import hashlib
 import logging
 from functools import partial
 
-import pymysql
-import requests
-import pandas as pd
+# Shared modules live in src/
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "src"))
+
+import templates
+import profiling
+import instrument
+
+# Maximum number of recipients Mailgun accepts in a single batch send
+MAILGUN_BATCH_LIMIT = 1000
 
 
 def get_config(file_name):
@@ -52,7 +59,7 @@ def get_data(connection, query):
         executing the query.
     """
 
-    return pd.read_sql(query, connection)
+    return instrument.read_sql(query, connection)
 
 
 def sha_256_hmac(key, msg):
@@ -105,11 +112,106 @@ def send_mail(api_url, api_user, api_key, data):
         Response of the API call
     """
 
+    import requests
+
     authorization = (api_user, api_key)
 
     return requests.post(api_url, auth=authorization, data=data)
 
 
+def make_batches(recipients, limit=MAILGUN_BATCH_LIMIT):
+    """
+    A function to split recipients into batches of at most `limit`
+    recipients, each email address appearing once per batch. A manager
+    of several events receives one mail per event.
+
+    Parameters
+    ----------
+    recipients: list
+        Tuples of email address and dict of recipient variables.
+
+    limit: int
+        Maximum number of recipients in a batch.
+
+    Returns
+    -------
+    list:
+        Dicts of email address -> recipient variables.
+    """
+
+    batches = []
+    for email, variables in recipients:
+        for batch in batches:
+            if email not in batch and len(batch) < limit:
+                batch[email] = variables
+                break
+        else:
+            batches.append({email: variables})
+    return batches
+
+
+def send_batch(api_url, api_user, api_key, sender, subject, text, recipients):
+    """
+    A function to send personalised mails to many recipients with
+    Mailgun batch sending and recipient variables.
+
+    Parameters
+    ----------
+    api_url: str
+        Mailgun API URL.
+
+    api_user: str
+        Name of Mailgun user.
+
+    api_key: str
+        Mailgun API key.
+
+    sender: str
+        Sender's name and email address in `Name <email>` format.
+
+    subject: str
+        Subject of the email.
+
+    text: str
+        Content of the email with `{event}` and `{password}` placeholders.
+
+    recipients: list
+        Tuples of email address and dict with `event` and `password`.
+
+    Returns
+    -------
+    list:
+        Tuples of email address, event, status code and the Mailgun
+        message id or error message, one per recipient.
+    """
+
+    # Mailgun substitutes %recipient.<name>% with the recipient's variables
+    template = text.format(event="%recipient.event%", password="%recipient.password%")
+    results = []
+
+    for batch in make_batches(recipients):
+        data = {
+            "from": sender,
+            "to": ["<{}>".format(email) for email in batch],
+            "subject": subject,
+            "text": template,
+            "recipient-variables": json.dumps(batch)
+        }
+        logging.info("Batch API call to {} recipients".format(len(batch)))
+        response = instrument.api_call("mailgun batch of {}".format(len(batch)), send_mail,
+                                       api_url, api_user, api_key, data)
+        try:
+            body = response.json()
+        except ValueError:
+            body = {"message": response.text}
+        logging.info("API call response = {}".format(body))
+
+        for email, variables in batch.items():
+            results.append((email, variables["event"], response.status_code, body.get("id", body.get("message"))))
+
+    return results
+
+
 def main():
     """
         Main function
@@ -135,10 +237,14 @@ def main():
         Handle any other exceptions.
     """
 
+    # Imported here so that the CLI starts without loading it
+    import pymysql
+
     try:
         # Initialize logging module
         logging.basicConfig(filename="logs.log", filemode="a", level=logging.DEBUG,
                             format="\n%(asctime)s  %(levelname)s: %(message)s")
+        instrument.start("event_mgr_sms_passwords")
         # Name of configuration file
         config_file_name = "config.json"
         # Get absolute file path of configuration file
@@ -152,6 +258,9 @@ def main():
         password = config["mysql_pass"]
         database = config["mysql_db"]
 
+        # Validate the message before anything is sent
+        template = templates.Template(config["text"], {"event", "password"})
+
         # Connect to MySQL database
         connection = pymysql.connect(host=host, user=user, passwd=password, db=database)
         logging.info("{}".format(str(connection)))
@@ -178,20 +287,43 @@ def main():
         api_key = config["mailgun_key"]
         sender = config["mailgun_sender"]
 
+        if "--dry-run" in sys.argv[1:]:
+            rows = [
+                (email, {"event": event, "password": password})
+                for email, event, password in zip(filtered_event_managers["email"],
+                                                  filtered_event_managers["event"],
+                                                  filtered_event_managers["password"])
+            ]
+            stats = templates.dry_run(template, rows, "Event manager passwords dry run.txt")
+            print("Rendered {messages} messages in {seconds}s ({per_second}/s)".format(**stats))
+            connection.close()
+            return
+
+        if "--batch" in sys.argv[1:]:
+            recipients = [
+                (email, {"event": event, "password": password})
+                for email, event, password in zip(filtered_event_managers["email"],
+                                                  filtered_event_managers["event"],
+                                                  filtered_event_managers["password"])
+            ]
+            results = send_batch(api_url, api_user, api_key, sender, config["subject"], config["text"], recipients)
+            for email, event, status, result in results:
+                print(status, email, event, result)
+            connection.close()
+            return
+
         for index, row in filtered_event_managers.iterrows():
             # Prepare the data
             data = {
                 "from": sender,
                 "to": "<{}>".format(row["email"]),
                 "subject": config["subject"],
-                "text": config["text"].format(
-                    event=row["event"],
-                    password=row["password"]
-                )
+                "text": template.render(event=row["event"], password=row["password"])
             }
             logging.info("API call params = {}".format(data))
             # Send the email
-            response = send_mail(api_url, api_user, api_key, data)
+            response = instrument.api_call("mailgun {}".format(row["email"]), send_mail,
+                                           api_url, api_user, api_key, data)
             logging.info("API call response = {}".format(response.json()))
 
         connection.close()
@@ -209,4 +341,4 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    profiling.run(main, "event_mgr_sms_passwords")
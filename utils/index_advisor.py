@@ -0,0 +1,267 @@
+"""A python script to check the query plans of the project's queries and advise indexes
+
+Usage: python utils/index_advisor.py [--apply]
+
+Every query pattern issued by the scripts is run through EXPLAIN on the
+configured MySQL or MariaDB database. Full table scans, filesorts and
+temporary tables are flagged and indexes are proposed only for the flagged
+queries. With `--apply` the missing indexes are created.
+"""
+
+import os
+import sys
+import json
+import logging
+
+import pymysql
+
+# Shared modules live in src/
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "src"))
+
+import profiling
+
+# Index name -> (table, columns). InnoDB appends the primary key to every
+# secondary index, so (event, year) also serves the `id` range of the
+# event wise entries and a separate (event, id) index would be redundant.
+INDEXES = {
+    "idx_participations_event_year": ("participations", ["event", "year"]),
+    "idx_events_type_department": ("events", ["type", "department"]),
+    "idx_events_name": ("events", ["name"]),
+}
+
+# (Script, query, indexes which serve it). The queries are formatted
+# with a sample `event`, `event_type`, `department` and `last_id`.
+QUERIES = [
+    ("attendance_sheets",
+     "SELECT receipt_no, name_1, name_2, name_3, name_4, name_5, name_6, mobile "
+     "FROM participations WHERE event = '{event}'",
+     ["idx_participations_event_year"]),
+    ("year_wise_participations",
+     "SELECT name FROM events WHERE type = '{event_type}' AND department = '{department}'",
+     ["idx_events_type_department"]),
+    ("year_wise_participations",
+     "SELECT year, COUNT(*) AS count FROM participations WHERE event = '{event}' GROUP BY year",
+     ["idx_participations_event_year"]),
+    ("event_wise_entries",
+     "SELECT event, COUNT(*) AS `entries` FROM participations WHERE id <= {last_id} "
+     "GROUP BY event ORDER BY `entries` DESC",
+     ["idx_participations_event_year"]),
+    ("desk_collections",
+     "SELECT p.id, p.receipt_no, p.event, e.fees FROM participations p JOIN events e ON p.event = e.name "
+     "WHERE id >= 1 AND id <= {last_id}",
+     ["idx_events_name"]),
+    ("daywise_participations",
+     "SELECT event, count(*) as total FROM participations GROUP by event order by total desc",
+     ["idx_participations_event_year"]),
+    ("sms_event_info",
+     "SELECT name_1, mobile FROM participations WHERE event = '{event}'",
+     ["idx_participations_event_year"]),
+]
+
+
+def get_config(file_name):
+    """
+    A function which takes the path of the configuration
+    file and returns a config object.
+
+    Parameters
+    ----------
+    file_name: str
+        Path of JSON configuration file.
+
+    Returns
+    -------
+    config: dict
+        Dictionary object created from JSON configuration.
+    """
+
+    with open(file_name) as config_file:
+        return json.load(config_file)
+
+
+def get_samples(cursor):
+    """
+    A function which picks sample values for the query placeholders
+    from the database.
+
+    Parameters
+    ----------
+    cursor: pymysql.cursors.DictCursor
+        Cursor of the database connection.
+
+    Returns
+    -------
+    dict:
+        Values of `event`, `event_type`, `department` and `last_id`.
+    """
+
+    cursor.execute("SELECT name, type, department FROM events LIMIT 1")
+    event = cursor.fetchone() or {"name": "", "type": "", "department": ""}
+    cursor.execute("SELECT COALESCE(MAX(id), 0) AS last_id FROM participations")
+
+    return {
+        "event": event["name"],
+        "event_type": event["type"],
+        "department": event["department"],
+        "last_id": cursor.fetchone()["last_id"]
+    }
+
+
+def get_existing_indexes(cursor, table):
+    """
+    A function which returns the indexes of a table.
+
+    Parameters
+    ----------
+    cursor: pymysql.cursors.DictCursor
+        Cursor of the database connection.
+
+    table: str
+        Name of the table.
+
+    Returns
+    -------
+    dict:
+        Index name -> list of its columns in order.
+    """
+
+    cursor.execute("SHOW INDEX FROM {}".format(table))
+    indexes = {}
+    for row in sorted(cursor.fetchall(), key=lambda row: (row["Key_name"], row["Seq_in_index"])):
+        indexes.setdefault(row["Key_name"], []).append(row["Column_name"])
+    return indexes
+
+
+def has_index(existing, columns):
+    """
+    A function which checks whether an existing index starts with
+    the given columns.
+
+    Parameters
+    ----------
+    existing: dict
+        Index name -> list of its columns.
+
+    columns: list
+        Columns of the wanted index.
+
+    Returns
+    -------
+    bool:
+        True if an existing index can be used instead.
+    """
+
+    return any(index_columns[:len(columns)] == columns for index_columns in existing.values())
+
+
+def check_plan(plan):
+    """
+    A function which finds the problems of an EXPLAIN output.
+
+    Parameters
+    ----------
+    plan: list
+        Rows of the EXPLAIN output as dicts.
+
+    Returns
+    -------
+    list:
+        Descriptions of full scans, filesorts and temporary tables.
+    """
+
+    problems = []
+    for row in plan:
+        extra = row.get("Extra") or ""
+        if row.get("type") == "ALL":
+            problems.append("full scan of {} ({} rows)".format(row["table"], row.get("rows")))
+        if "filesort" in extra:
+            problems.append("filesort on {}".format(row["table"]))
+        if "temporary" in extra:
+            problems.append("temporary table on {}".format(row["table"]))
+    return problems
+
+
+def advise(connection, apply=False):
+    """
+    A function which explains every query and proposes, or creates,
+    the missing indexes serving the queries whose plan was flagged.
+    An index is proposed once, for the first flagged query it serves.
+
+    Parameters
+    ----------
+    connection: pymysql.connections.Connection
+        Database connection object.
+
+    apply: bool
+        Create the missing indexes if True.
+
+    Returns
+    -------
+    list:
+        Dicts of script, query, problems and proposed indexes.
+    """
+
+    cursor = connection.cursor(pymysql.cursors.DictCursor)
+    samples = get_samples(cursor)
+    existing = {table: get_existing_indexes(cursor, table) for table in ("events", "participations")}
+
+    report = []
+    for script, query, index_names in QUERIES:
+        query = query.format(**samples)
+        cursor.execute("EXPLAIN " + query)
+        problems = check_plan(cursor.fetchall())
+
+        proposed = []
+        for name in index_names if problems else []:
+            table, columns = INDEXES[name]
+            if not has_index(existing[table], columns):
+                proposed.append("CREATE INDEX {} ON {} ({})".format(name, table, ", ".join(columns)))
+                # Later queries served by the same index need no proposal of their own
+                existing[table][name] = columns
+
+        report.append({"script": script, "query": query, "problems": problems, "proposed": proposed})
+        logging.info("EXPLAIN {} problems={} proposed={}".format(query, problems, proposed))
+
+    if apply:
+        for statement in [statement for item in report for statement in item["proposed"]]:
+            logging.info(statement)
+            cursor.execute(statement)
+        connection.commit()
+
+    cursor.close()
+    return report
+
+
+def main():
+    try:
+        logging.basicConfig(filename="logs.log", filemode="a", level=logging.DEBUG,
+                            format="\n%(asctime)s  %(levelname)s: %(message)s")
+        config = get_config(os.path.join(os.path.abspath("."), "config.json"))
+        apply = "--apply" in sys.argv[1:]
+
+        connection = pymysql.connect(host=config["mysql_host"], user=config["mysql_user"],
+                                     passwd=config["mysql_pass"], db=config["mysql_db"])
+        report = advise(connection, apply)
+        connection.close()
+
+        for item in report:
+            print("[{}] {}".format(item["script"], item["query"]))
+            for problem in item["problems"] or ["ok"]:
+                print("    {}".format(problem))
+            for statement in item["proposed"]:
+                print("    {}{}".format("applied: " if apply else "propose: ", statement))
+
+    except FileNotFoundError as file_err:
+        logging.exception(str(file_err))
+    except json.decoder.JSONDecodeError as json_err:
+        logging.exception(str(json_err))
+    except KeyError as key_err:
+        logging.exception(str(key_err))
+    except pymysql.err.Error as pymysql_err:
+        logging.exception(pymysql_err)
+    except Exception as ex:
+        logging.exception(str(ex))
+
+
+if __name__ == '__main__':
+    profiling.run(main, 'index_advisor')
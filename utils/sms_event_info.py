@@ -8,9 +8,12 @@ import pprint
 import logging
 import hashlib
 
-import pymysql
-import requests
-import pandas as pd
+# Shared modules live in src/
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "src"))
+
+import templates
+import profiling
+import instrument
 
 
 def get_config(file_name):
@@ -100,7 +103,7 @@ def get_data(connection, query):
         executing the query.
     """
 
-    return pd.read_sql(query, connection)
+    return instrument.read_sql(query, connection)
 
 
 def send_sms(data):
@@ -117,14 +120,23 @@ def send_sms(data):
     requests.Response
         The response of the API call.
     """
+
+    import requests
+
     return requests.post("http://api.textlocal.in/send/", data=data)
 
 
 def main():
+    # Imported here so that the CLI starts without loading pandas and pymysql
+    import pymysql
+    import loader
+    import recipients
+
     try:
         # Initialize logging module
         logging.basicConfig(filename="logs.log", filemode="a", level=logging.DEBUG,
                             format="\n%(asctime)s  %(levelname)s: %(message)s")
+        instrument.start("sms_event_info")
         # Name of configuration file
         config_file_name = "config.json"
         # Get absolute file path of configuration file
@@ -138,18 +150,36 @@ def main():
         password = config["mysql_pass"]
         database = config["mysql_db"]
 
+        args = [arg for arg in sys.argv[1:] if arg != "--dry-run"]
+        event = args[0]
+        # Validate the message before anything is sent
+        template = templates.Template(config[event], {"password"})
+
         # Connect to MySQL database
         connection = pymysql.connect(host=host, user=user, passwd=password, db=database)
         logging.info("Connected to database {} on host {} ".format(database, host))
 
-        event = sys.argv[1]
-
         query = "SELECT name_1, mobile FROM participations WHERE event = '{}'"
-        logging.info(query)
 
-        participants = get_data(connection, query.format(event))
+        participants = loader.read_typed(query.format(event), connection)
+        # Drop invalid and repeated mobile numbers before sending anything
+        participants, counts = recipients.prepare_recipients(participants)
+        print("{total} participants, {invalid} invalid, {duplicates} duplicate numbers, "
+              "{recipients} recipients".format(**counts))
+        participants["mobile"] = participants["e164"].str[len("+" + recipients.COUNTRY_CODE):]
         participants["password"] = participants.apply(lambda row: sha_256_hmac("key", str(row["mobile"])), axis=1)
 
+        if "--dry-run" in sys.argv[1:]:
+            rows = [
+                (mobile, {"password": sha_256_hmac("event-secret", mobile)})
+                for mobile in participants["mobile"]
+            ]
+            stats = templates.dry_run(template, rows, "{} dry run.txt".format(event))
+            print("Rendered {messages} messages in {seconds}s ({per_second}/s), "
+                  "{segments} segments, at most {max_segments} per message".format(**stats))
+            connection.close()
+            return
+
         data = {
             "numbers": "Comma separated mobile numbers or a single mobile number",
             "message": "Message",
@@ -160,13 +190,13 @@ def main():
         }
 
         for _, row in participants.iterrows():
-            data["numbers"] = str(int(row["mobile"]))
-            data["message"] = config[event].format(password=sha_256_hmac("event-secret", str(int(row["mobile"]))))
+            data["numbers"] = str(row["mobile"])
+            data["message"] = template.render(password=sha_256_hmac("event-secret", str(row["mobile"])))
             data["custom"] = row["name_1"]
 
             logging.info("API call params = {}".format(data))
             # Send SMS
-            response = send_sms(data)
+            response = instrument.api_call("textlocal {}".format(data["numbers"]), send_sms, data)
             pprint.pprint(response.json())
             logging.info("API call response = {}".format(json.dumps(response.json())))
 
@@ -185,4 +215,4 @@ def main():
 
 
 if __name__ == '__main__':
-    main()
+    profiling.run(main, 'sms_event_info')
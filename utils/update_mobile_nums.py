@@ -4,8 +4,13 @@ import json
 import logging
 
 import os
-import pymysql
-import pandas as pd
+import sys
+
+# Shared modules live in src/
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "src"))
+
+import profiling
+import instrument
 
 
 def get_config(file_name):
@@ -53,10 +58,15 @@ def main():
         Handle any other exceptions.
     """
 
+    # Imported here so that the CLI starts without loading them
+    import pymysql
+    import pandas as pd
+
     try:
         # Initialize logging module
         logging.basicConfig(filename="logs.log", filemode="a", level=logging.DEBUG,
                             format="\n%(asctime)s  %(levelname)s: %(message)s")
+        instrument.start("update_mobile_nums")
         # Name of configuration file
         config_file_name = "config.json"
         # Get absolute file path of configuration file
@@ -83,11 +93,12 @@ def main():
 
         # Read a CSV file containing names and mobile
         # numbers of participants
-        df = pd.read_csv("filename.csv")
+        with instrument.stage("read", "filename.csv") as info:
+            df = pd.read_csv("filename.csv")
+            info.update(rows=len(df), bytes=instrument.file_size("filename.csv"))
 
         for _, row in df.iterrows():
-            logging.info(query.format(mobile=row["Mobile"], name=row["Name"]))
-            status = cursor.execute(query.format(mobile=row["Mobile"], name=row["Name"]))
+            status = instrument.execute(cursor, query.format(mobile=row["Mobile"], name=row["Name"]))
             logging.info(status)
 
         cursor.close()
@@ -106,4 +117,4 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    profiling.run(main, "update_mobile_nums")